@@ -0,0 +1,123 @@
+"""
+Расчёт розничных цен SKU.
+
+Правила цены собираются один раз из секции `pricing` конфига в `PricingEngine`,
+после чего все SKU пачки SPU считаются одним синхронным вызовом.
+Вся арифметика целочисленная (коэффициенты хранятся как несократимые дроби),
+поэтому результат не зависит от погрешностей float и совпадает в NumPy и чистом Python.
+"""
+from fractions import Fraction
+from functools import lru_cache
+
+from loguru import logger
+
+from domain import SPU
+
+try:
+    import numpy as np
+except ImportError:  # NumPy не обязателен: без него считаем в чистом Python
+    np = None
+
+
+class PricingEngine:
+    MODES = ('thepoizon', 'dewu')
+    # Начиная с этого числа цен расчёт идёт через NumPy (на маленьких пачках накладные расходы выше выигрыша)
+    NUMPY_THRESHOLD = 64
+    # Вычет из цены в юанях в режиме dewu
+    DEWU_OFFSET = 2632
+
+    def __init__(self, mode: str, *, x: int = 0, y: int = 0, z: int = 0,
+                 exchange_rate: float | str = '15.82', coefficient: float | str = '0.8'):
+        """
+        :param mode: `thepoizon` — цена * `coefficient` с банковским округлением;
+            `dewu` — (цена - 2632) // `exchange_rate` + X + Y + Z
+        :param exchange_rate: делитель цены в режиме dewu
+        :param coefficient: множитель цены в режиме thepoizon
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Неизвестный режим расчёта цены: {mode!r}, ожидается один из {self.MODES}")
+        self.mode = mode
+        self.markup = int(x) + int(y) + int(z)
+        # Fraction(str(...)): 15.82 -> 791/50 ровно, без двоичной погрешности float
+        self.exchange_rate = Fraction(str(exchange_rate))
+        self.coefficient = Fraction(str(coefficient))
+        if self.exchange_rate <= 0 or self.coefficient <= 0:
+            raise ValueError("exchange_rate и coefficient должны быть положительными")
+        # Множитель цены в виде дроби num/den: coefficient для thepoizon, 1/exchange_rate для dewu
+        ratio = self.coefficient if mode == 'thepoizon' else 1 / self.exchange_rate
+        self._num, self._den = ratio.numerator, ratio.denominator
+
+    @classmethod
+    def from_config(cls, config: dict) -> 'PricingEngine':
+        """
+        Движок для секции `pricing` конфига; для одинаковых настроек возвращается один и тот же экземпляр.
+        """
+        pricing = config['pricing']
+        return cls._compile(pricing['mode'], pricing.get('X', 0), pricing.get('Y', 0), pricing.get('Z', 0),
+                            str(pricing.get('exchange_rate', '15.82')), str(pricing.get('coefficient', '0.8')))
+
+    @classmethod
+    @lru_cache(maxsize=8)
+    def _compile(cls, mode, x, y, z, exchange_rate, coefficient) -> 'PricingEngine':
+        return cls(mode, x=x, y=y, z=z, exchange_rate=exchange_rate, coefficient=coefficient)
+
+    def price(self, value: int) -> int:
+        """
+        Цена одного SKU. `value` — цена Poizon в минимальных единицах (фэнях).
+        """
+        price = int(value) // 100
+        num, den = self._num, self._den
+        if self.mode == 'thepoizon':
+            quotient, remainder = divmod(price * num, den)
+            # Округление к ближайшему, половина — к чётному (как round())
+            if 2 * remainder > den or (2 * remainder == den and quotient % 2):
+                quotient += 1
+            return quotient
+        return (price - self.DEWU_OFFSET) * num // den + self.markup
+
+    def price_many(self, values) -> list[int]:
+        """
+        Цены пачки SKU одним вызовом, порядок сохраняется.
+        """
+        values = list(values)
+        if np is None or len(values) < self.NUMPY_THRESHOLD:
+            return [self.price(value) for value in values]
+        prices = np.asarray(values, dtype=np.int64) // 100
+        num, den = self._num, self._den
+        if self.mode == 'thepoizon':
+            quotient, remainder = np.divmod(prices * num, den)
+            round_up = (2 * remainder > den) | ((2 * remainder == den) & (quotient % 2 == 1))
+            return (quotient + round_up).tolist()
+        return ((prices - self.DEWU_OFFSET) * num // den + self.markup).tolist()
+
+    def price_spus(self, spus: list[SPU]):
+        """
+        Пересчитывает цены всех SKU пачки SPU на месте. SKU без цены не трогаются.
+        """
+        skus = [sku for spu in spus for sku in spu.skus if sku.regular_price]
+        for sku, price in zip(skus, self.price_many(sku.regular_price for sku in skus)):
+            sku.regular_price = price
+
+    def price_spus_safe(self, spus: list[SPU]) -> tuple[list[SPU], list[tuple[SPU, Exception]]]:
+        """
+        Как `price_spus`, но ошибка одного SPU не мешает остальным.
+        При ошибке пакета цены не изменены (`price_many` считает всё до присваивания),
+        поэтому пакет пересчитывается по одному SPU.
+
+        :return: (SPU с пересчитанными ценами, [(SPU, ошибка), ...])
+        """
+        try:
+            self.price_spus(spus)
+            return list(spus), []
+        except Exception:
+            pass
+        priced, failed = [], []
+        for spu in spus:
+            try:
+                self.price_spus([spu])
+            except Exception as e:
+                logger.error(f"❗ Ошибка расчёта цены `{spu.title}`: {e}")
+                failed.append((spu, e))
+                continue
+            priced.append(spu)
+        return priced, failed
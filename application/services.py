@@ -3,21 +3,64 @@ import asyncio
 from loguru import logger
 
 from domain import SPU
-from utils import retry_async
+
+
+class SPURegistry:
+    """
+    Реестр SPU на время одного запуска: гарантирует, что каждый spu_id
+    проходит каждый этап (`fetch` — загрузка и маппинг, `upload` — выгрузка) не более одного раза.
+    """
+    FETCH = 'fetch'
+    UPLOAD = 'upload'
+
+    def __init__(self, completed: set = None):
+        """
+        :param completed: SPU, полностью обработанные в прерванном запуске (журнал `--resume`)
+        """
+        self._claimed: dict[str, set] = {}
+        self.duplicates: dict[str, int] = {}
+        self.completed = completed or set()
+
+    def is_completed(self, spu_id) -> bool:
+        return spu_id in self.completed
+
+    def claim(self, spu_id, stage: str) -> bool:
+        """
+        Закрепляет spu_id за этапом. Возвращает False, если он уже был закреплён ранее.
+        """
+        claimed = self._claimed.setdefault(stage, set())
+        if spu_id in claimed:
+            self.duplicates[stage] = self.duplicates.get(stage, 0) + 1
+            logger.debug(f"SPU {spu_id} уже обработан на этапе `{stage}`, пропускаем дубль")
+            return False
+        claimed.add(spu_id)
+        return True
+
+    def release(self, spu_id, stage: str):
+        """
+        Снимает закрепление (например, если загрузка упала и SPU можно попробовать снова).
+        """
+        self._claimed.get(stage, set()).discard(spu_id)
+
+    def report(self):
+        for stage in (self.FETCH, self.UPLOAD):
+            logger.info(f"Этап `{stage}`: уникальных SPU {len(self._claimed.get(stage, ()))}, "
+                        f"пропущено дублей {self.duplicates.get(stage, 0)}")
 
 
 class PoizonSPUService:
-    def __init__(self, client, mapper):
+    SEARCH_PAGE_SIZE = 20
+
+    def __init__(self, client, mapper, concurrency: int = 5, registry: SPURegistry = None):
         self.client = client
         self.mapper = mapper
+        self.concurrency = max(1, concurrency)
+        self.registry = registry
+        # Сколько товаров засчитано в квоту без загрузки (уже выгружены в прерванном запуске)
+        self.resumed = 0
 
-    async def fetch_page(self, *,
-                         brand_name: str, brand_ids: list[int],
-                         page: int, remaining: int) -> list[SPU]:
-        products = await retry_async(self.client.search_products, brand_name, page, page_size=20,
-                                     retries=5,
-                                     delay=5)
-        spus = []
+    def filter_candidates(self, products: list[dict], *, brand_name: str, brand_ids: list[int]) -> list[dict]:
+        candidates = []
         for product in products:
             if product.get('brandId') not in brand_ids:
                 logger.debug(
@@ -28,28 +71,81 @@ class PoizonSPUService:
             if 'adidas' in brand_name.lower() and 'yeezy' in product.get('title').lower():
                 logger.debug(f"При парсинге бренда Adidas найден товар `{product.get('title')}`. Пропускаем...")
                 continue
-            if remaining <= 0:
-                break
-            spu = await self.get_spu_by_spu_id(product['spuId'])
-            if spu.skus and spu.article_code:
-                spus.append(spu)
-                remaining -= 1
-                logger.info(
-                    f'Получен товар `{spu.title}`(id={spu.id_}) with category={spu.category_id}, skus={len(spu.skus)}; '
-                    f'images={len(spu.images)}')
-                await asyncio.sleep(1)
-            else:
-                logger.warning(f"Пропускаем `{spu.title}` — нет размеров или артикула")
-        return spus
-
-    async def get_spu_by_spu_id(self, spu_id:int) -> SPU:
-        detailed_product = await retry_async(self.client.get_product_info, spu_id,
-                                             retries=5,
-                                             delay=1)
-        spu = self.mapper.from_poizon_to_domain(detailed_product)
-        return spu
+            candidates.append(product)
+        return candidates
+
+    async def fetch_page(self, *,
+                         brand_name: str, brand_ids: list[int],
+                         page: int, remaining: int, sink=None) -> list[SPU]:
+        products = await self.search_page(brand_name=brand_name, page=page)
+        candidates = self.filter_candidates(products, brand_name=brand_name, brand_ids=brand_ids)
+        return await self.fetch_candidates(candidates, remaining=remaining, sink=sink)
 
+    async def search_page(self, *, brand_name: str, page: int) -> list[dict]:
+        # Повторы и паузы — на стороне клиента (RetryPolicy)
+        return await self.client.search_products(brand_name, page, page_size=self.SEARCH_PAGE_SIZE)
 
+    async def fetch_candidates(self, candidates: list[dict], *, remaining: int, sink=None) -> list[SPU]:
+        """
+        Загружает детали кандидатов параллельно (не более `self.concurrency` одновременно).
+
+        Одновременно в работе не больше запросов, чем ещё не хватает товаров до `remaining`,
+        поэтому лишние товары не запрашиваются. Порядок результата совпадает с порядком кандидатов.
+        Товары, которые не удалось загрузить, пропускаются. Товары, уже выгруженные в прерванном
+        запуске, не загружаются, но засчитываются в `remaining` (см. `self.resumed`).
+
+        :param sink: async-функция, которой передаётся каждый принятый SPU сразу после загрузки
+        """
+        accepted: list[tuple[int, SPU]] = []
+        pending: dict[asyncio.Task, int] = {}
+        queue = iter(enumerate(candidates))
+        try:
+            while True:
+                while len(pending) < min(self.concurrency, remaining - len(accepted)):
+                    index, product = next(queue, (None, None))
+                    if product is None:
+                        break
+                    if self.registry and self.registry.is_completed(product['spuId']):
+                        self.resumed += 1
+                        remaining -= 1
+                        continue
+                    if self.registry and not self.registry.claim(product['spuId'], SPURegistry.FETCH):
+                        continue
+                    pending[asyncio.create_task(self.get_spu_by_spu_id(product['spuId']))] = index
+                if not pending:
+                    break
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    index = pending.pop(task)
+                    if task.exception():
+                        # Ошибка одного товара (после всех повторов клиента) не прерывает страницу
+                        if self.registry:
+                            self.registry.release(candidates[index]['spuId'], SPURegistry.FETCH)
+                        logger.warning(f"Не удалось загрузить товар {candidates[index]['spuId']}: "
+                                       f"{task.exception()}")
+                        continue
+                    spu = task.result()
+                    if spu.skus and spu.article_code:
+                        accepted.append((index, spu))
+                        if sink:
+                            await sink(spu)
+                        logger.info(
+                            f'Получен товар `{spu.title}`(id={spu.id_}) with category={spu.category_id}, '
+                            f'skus={len(spu.skus)}; images={len(spu.images)}')
+                    else:
+                        logger.warning(f"Пропускаем `{spu.title}` — нет размеров или артикула")
+        finally:
+            for task, index in pending.items():
+                task.cancel()
+                if self.registry:
+                    self.registry.release(candidates[index]['spuId'], SPURegistry.FETCH)
+        accepted.sort(key=lambda item: item[0])
+        return [spu for _, spu in accepted]
+
+    async def get_spu_by_spu_id(self, spu_id: int) -> SPU:
+        detailed_product = await self.client.get_product_info(spu_id)
+        spu = self.mapper.from_poizon_to_domain(detailed_product)
+        return spu
 
 
 class BrandNormalizer:
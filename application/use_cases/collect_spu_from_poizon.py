@@ -1,6 +1,9 @@
+import asyncio
+
 from loguru import logger
 
-from application.services import PoizonSPUService
+from application.services import PoizonSPUService, SPURegistry
+from infrastracture.metrics import run_metrics
 
 
 async def collect_spu_from_poizon(*,
@@ -8,25 +11,54 @@ async def collect_spu_from_poizon(*,
                                   brand_ids: list[int],
                                   max_pages: int,
                                   max_products: int,
-                                  client, mapper) -> list:
+                                  client, mapper,
+                                  registry: SPURegistry = None,
+                                  sink=None,
+                                  prefetch: int = 1) -> list:
+    """
+    :param sink: async-функция, получающая каждый SPU сразу после загрузки (этап конвейера)
+    :param prefetch: сколько следующих страниц поиска запрашивать заранее, пока загружаются
+        детали текущей (0 — без упреждения)
+    """
     logger.info(f'Начался поиск по бренду `{brand_name}`...')
     spu_collector = []
-    service = PoizonSPUService(client, mapper)
+    service = PoizonSPUService(client, mapper, registry=registry)
 
     remaining = max_products
     cur_page = 0
+    searches: dict[int, asyncio.Task] = {}
+    last_page = max_pages  # номер последней страницы, которую имеет смысл запрашивать
+
+    def schedule(up_to: int):
+        for page in range(cur_page, min(up_to, last_page) + 1):
+            if page not in searches:
+                searches[page] = asyncio.create_task(service.search_page(brand_name=brand_name, page=page))
 
-    while cur_page < max_pages and remaining > 0:
-        cur_page += 1
-        try:
-            spus = await service.fetch_page(brand_name=brand_name,
-                                            brand_ids=brand_ids,
-                                            page=cur_page,
-                                            remaining=remaining)
-        except Exception as e:
-            logger.error(f'Не удалось обработать {brand_name} на странице {cur_page}. msg:{e}')
-            break
-        spu_collector.extend(spus)
-        remaining = max_products - len(spu_collector)
+    try:
+        while cur_page < last_page and remaining > 0:
+            cur_page += 1
+            schedule(cur_page + prefetch)
+            try:
+                products = await searches.pop(cur_page)
+            except Exception as e:
+                logger.error(f'Не удалось обработать {brand_name} на странице {cur_page}. msg:{e}')
+                break
+            if len(products) < service.SEARCH_PAGE_SIZE:
+                # Поиск исчерпан: дальше страниц нет
+                last_page = cur_page
+            candidates = service.filter_candidates(products, brand_name=brand_name, brand_ids=brand_ids)
+            spus = await service.fetch_candidates(candidates, remaining=remaining, sink=sink)
+            spu_collector.extend(spus)
+            remaining = max_products - len(spu_collector) - service.resumed
+    finally:
+        # Заранее запрошенные, но не понадобившиеся страницы
+        for task in searches.values():
+            if task.done() and not task.cancelled():
+                task.exception()  # ошибка ненужной страницы не важна, помечаем как обработанную
+            else:
+                task.cancel()
+        if searches:
+            run_metrics.increment('search_prefetch_unused', len(searches))
+            logger.debug(f'По бренду `{brand_name}` не понадобилось заранее запрошенных страниц: {len(searches)}')
     logger.info(f'По бренду `{brand_name}` обработано {cur_page} страниц и собрано {len(spu_collector)} товаров')
     return spu_collector
@@ -1,16 +1,17 @@
-import asyncio
-
 from loguru import logger
-from application.services import PoizonSPUService
+from application.services import PoizonSPUService, SPURegistry
 from infrastracture import mappers
-from utils import retry_async
+from infrastracture.woo_client import SPU_ID_META_KEY
 
 
 async def collect_spus_from_last_top(*,
                                      new_top: list,
                                      woo_client,
                                      pz_client,
-                                     brand: str) -> list:
+                                     brand: str,
+                                     catalog_index: dict[str, list[int]] = None,
+                                     registry: SPURegistry = None,
+                                     sink=None) -> list:
     """
     Собирает товары из предыдущей выгрузки, которые есть в WooCommerce,
     но не входят в новый топ.
@@ -19,6 +20,10 @@ async def collect_spus_from_last_top(*,
     :param woo_client: экземпляр клиента WooCommerce
     :param pz_client: экземпляр клиента Poizon
     :param brand: бренд для фильтрации
+    :param catalog_index: индекс каталога бренд -> spu_id (`AsyncWooClient.get_spu_ids_by_brand_index`),
+        построенный один раз на запуск. Если не передан — каталог бренда загружается отдельно.
+    :param registry: реестр SPU запуска — товары, уже загруженные другим брендом, пропускаются
+    :param sink: async-функция, получающая каждый SPU сразу после загрузки (этап конвейера)
     :return: список SPU (старые, вышедшие из топа)
     """
     logger.info(f'Начался сбор товаров из предыдущего топа по бренду `{brand}` ...')
@@ -27,26 +32,36 @@ async def collect_spus_from_last_top(*,
     # Получаем ID SPU из нового топа
     new_spu_ids = {spu.id_ for spu in new_top}
 
-    # Получаем все товары WooCommerce для бренда
-    existing_products = await woo_client.get_all_products_by_brand(brand=brand)
+    # Получаем spu_id всех товаров WooCommerce для бренда
+    if catalog_index is not None:
+        existing_spu_ids = catalog_index.get(brand.lower(), [])
+    else:
+        existing_products = await woo_client.get_all_products_by_brand(brand=brand, fields=("id", "meta_data"))
+        existing_spu_ids = []
+        for product in existing_products:
+            spu_id_meta = woo_client.get_meta_value(product, SPU_ID_META_KEY)
+            if spu_id_meta:
+                existing_spu_ids.append(int(spu_id_meta))
 
     old_spus = []
-    for product in existing_products:
+    for spu_id in existing_spu_ids:
+        if spu_id in new_spu_ids:
+            continue
+        if registry and (registry.is_completed(spu_id) or not registry.claim(spu_id, SPURegistry.FETCH)):
+            continue
         try:
-            # Проверяем meta_data на наличие _poizon_spu_id
-            spu_id_meta = next((meta["value"] for meta in product.get("meta_data", [])
-                                if meta["key"] == "_poizon_spu_id"), None)
-            if spu_id_meta and int(spu_id_meta) not in new_spu_ids:
-                spu_id_meta = int(spu_id_meta)
-                old_spu = await pz_service.get_spu_by_spu_id(spu_id=spu_id_meta)
-                await asyncio.sleep(0.6)
-                if old_spu.skus and old_spu.article_code:
-                    logger.info(
-                        f'Добавлен товар для обновления из прошлого топа `{old_spu.title}`(id={old_spu.id_}) with category={old_spu.category_id}, skus={len(old_spu.skus)}; '
-                        f'images={len(old_spu.images)}')
-                    old_spus.append(old_spu)
+            old_spu = await pz_service.get_spu_by_spu_id(spu_id=spu_id)
+            if old_spu.skus and old_spu.article_code:
+                logger.info(
+                    f'Добавлен товар для обновления из прошлого топа `{old_spu.title}`(id={old_spu.id_}) with category={old_spu.category_id}, skus={len(old_spu.skus)}; '
+                    f'images={len(old_spu.images)}')
+                old_spus.append(old_spu)
+                if sink:
+                    await sink(old_spu)
         except Exception as e:
-            logger.warning(f"Ошибка загрузки SPU {product}: {e}")
+            if registry:
+                registry.release(spu_id, SPURegistry.FETCH)
+            logger.warning(f"Ошибка загрузки SPU {spu_id}: {e}")
     logger.info(
-        f'Собрано {len(existing_products)} товаров из прошлого топа. Из них не попали в новый топ и подлежат обновлению {len(old_spus)} товаров...')
+        f'Собрано {len(existing_spu_ids)} товаров из прошлого топа. Из них не попали в новый топ и подлежат обновлению {len(old_spus)} товаров...')
     return old_spus
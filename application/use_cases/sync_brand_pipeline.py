@@ -0,0 +1,137 @@
+import asyncio
+import time
+
+from loguru import logger
+
+from application.pricing import PricingEngine
+from application.services import SPURegistry
+from infrastracture.metrics import run_metrics
+from application.use_cases.collect_spu_from_poizon import collect_spu_from_poizon
+from application.use_cases.collect_spus_from_last_top import collect_spus_from_last_top
+from application.use_cases.upload_spu_to_woocommerce import (
+    UploadResult, log_upload_summary, upload_spus_from_queue,
+)
+
+
+async def sync_brand_pipeline(*,
+                              brand_name: str,
+                              brand_ids: list[int],
+                              max_pages: int,
+                              max_products: int,
+                              pz_client,
+                              woo_client,
+                              mapper,
+                              config: dict,
+                              catalog_index: dict[str, list[int]] = None,
+                              registry: SPURegistry = None,
+                              journal=None,
+                              ) -> list[UploadResult]:
+    """
+    Потоковая синхронизация бренда: SPU уходят в WooCommerce, как только готовы.
+
+    Этапы соединены ограниченными очередями (размер `pipeline.queue_size`), поэтому
+    быстрый этап ждёт медленный, а не копит товары в памяти:
+
+        поиск + детали + маппинг (новый топ, затем прошлый топ) -> цены -> выгрузка
+
+    Поиск и загрузка деталей остаются одним этапом: сколько страниц искать, зависит от того,
+    сколько товаров прошло проверку после загрузки деталей.
+    Выгрузка — пул из `upload.concurrency` воркеров. Товары прошлого топа уже есть в WooCommerce:
+    при `upload.price_only_last_top` у них обновляются только цены и наличие вариаций.
+
+    :param journal: журнал запуска (`RunJournal`): в него пишутся загруженные и выгруженные SPU
+    """
+    queue_size = config.get('pipeline', {}).get('queue_size', 20)
+    upload_concurrency = max(1, config.get('upload', {}).get('concurrency', 1))
+    priced_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    upload_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    price_only_last_top = config.get('upload', {}).get('price_only_last_top', True)
+    price_only: set = set()
+    # SPU, на которых упал расчёт цен: до выгрузки они не доходят, но попадают в итоги
+    pricing_failed: list[UploadResult] = []
+
+    async def sink(spu):
+        if journal:
+            await journal.amark_fetched(spu.id_, brand_name)
+        await priced_queue.put(spu)
+
+    async def last_top_sink(spu):
+        if price_only_last_top:
+            price_only.add(spu.id_)
+        await sink(spu)
+
+    async def on_result(result: UploadResult):
+        if journal and result.ok:
+            await journal.amark_uploaded(result.spu_id, result.product_id)
+
+    # Конец потока помечается None только при успешном завершении этапа. При ошибке TaskGroup
+    # отменяет остальные этапы, поэтому ждать места в очереди ради None нельзя — его некому забрать
+    async def collect_stage():
+        with run_metrics.stage('collect'):
+            new_top = await collect_spu_from_poizon(brand_name=brand_name,
+                                                    brand_ids=brand_ids,
+                                                    max_pages=max_pages,
+                                                    max_products=max_products,
+                                                    client=pz_client,
+                                                    mapper=mapper,
+                                                    registry=registry,
+                                                    sink=sink,
+                                                    prefetch=config.get('poizon', {}).get(
+                                                        'search_prefetch', 1),
+                                                    )
+        with run_metrics.stage('reconcile'):
+            await collect_spus_from_last_top(new_top=new_top,
+                                             woo_client=woo_client,
+                                             pz_client=pz_client,
+                                             brand=brand_name,
+                                             catalog_index=catalog_index,
+                                             registry=registry,
+                                             sink=last_top_sink,
+                                             )
+        await priced_queue.put(None)
+
+    async def price_stage():
+        # Все SPU, уже лежащие в очереди, считаются одним вызовом движка цен
+        engine = PricingEngine.from_config(config)
+        finished = False
+        while not finished:
+            batch = [await priced_queue.get()]
+            while not priced_queue.empty():
+                batch.append(priced_queue.get_nowait())
+            if None in batch:
+                finished = True
+                batch = batch[:batch.index(None)]
+            batch = [spu for spu in batch if not registry or registry.claim(spu.id_, SPURegistry.UPLOAD)]
+            started_pricing = time.perf_counter()
+            priced, failed = engine.price_spus_safe(batch)
+            for spu, e in failed:
+                if registry:
+                    registry.release(spu.id_, SPURegistry.UPLOAD)
+                pricing_failed.append(UploadResult(spu_id=spu.id_, title=spu.title, ok=False,
+                                                   duration=time.perf_counter() - started_pricing, error=str(e)))
+            for spu in priced:
+                await upload_queue.put(spu)
+        for _ in range(upload_concurrency):
+            await upload_queue.put(None)
+
+    async def upload_stage():
+        with run_metrics.stage('upload'):
+            return await upload_spus_from_queue(queue=upload_queue, config=config, client=woo_client,
+                                                mapper=mapper, concurrency=upload_concurrency, priced=True,
+                                                batch_size=config.get('upload', {}).get('batch_size', 1),
+                                                on_result=on_result,
+                                                price_only=price_only)
+
+    logger.info(f'Запущен конвейер по бренду `{brand_name}` (воркеров выгрузки: {upload_concurrency})')
+    started = time.perf_counter()
+    try:
+        # Ошибка любого этапа отменяет остальные: иначе они навсегда встанут на заполненной очереди
+        async with asyncio.TaskGroup() as group:
+            group.create_task(collect_stage())
+            group.create_task(price_stage())
+            upload_task = group.create_task(upload_stage())
+    except ExceptionGroup as eg:
+        raise eg.exceptions[0] from eg
+    results = upload_task.result() + pricing_failed
+    log_upload_summary(results, time.perf_counter() - started)
+    return results
@@ -1,42 +1,166 @@
 import asyncio
+import time
+from dataclasses import dataclass
 
 from loguru import logger
 
-import domain
+from application.pricing import PricingEngine
 from domain import SPU
+from infrastracture.metrics import run_metrics
 
 
-async def process_spu(spu, config, mapper, client, ):
+@dataclass
+class UploadResult:
+    spu_id: int
+    title: str
+    ok: bool
+    duration: float
+    error: str | None = None
+    product_id: int | None = None
+
+
+def price_spus(spus: list[SPU], config: dict):
+    PricingEngine.from_config(config).price_spus(spus)
+
+
+async def process_spu(spu, config, mapper, client, priced: bool = False,
+                      price_only: bool = False) -> UploadResult:
+    """
+    :param priced: цены SKU уже пересчитаны (этап цен конвейера), повторно не считаем
+    :param price_only: товар уже есть в WooCommerce — обновляем только цены и наличие вариаций
+        (`update_product_prices`); если это невозможно, выполняется полная выгрузка
+    """
+    started = time.perf_counter()
+    ok, error, product_id = False, None, None
     try:
-        for sku in spu.skus:
-            if sku.regular_price:
-                sku.regular_price = await domain.calculate_price(sku.regular_price, mode=config['pricing']['mode'],
-                                                                 x=config['pricing']['X'], y=config['pricing']['Y'],
-                                                                 z=config['pricing']['Z'])
+        if not priced:
+            price_spus([spu], config)
 
         base, variations = mapper.from_domain_to_woocomerce(spu)
-        status, result = await client.create_or_update_variable_product_with_variations(base, variations)
+        response = await client.update_product_prices(base, variations) if price_only else None
+        if response is None:
+            status, result = await client.create_or_update_variable_product_with_variations(base, variations)
+        else:
+            status, result = response
+            run_metrics.increment('price_only_updates')
 
         if status in [200, 201]:
-            logger.success(f"📤 `{spu.title}` успешно выгружен в WooCommerce")
+            ok = True
+            product_id = result.get('id')
+            logger.success(f"📤 `{spu.title}` успешно " + ("обновлены цены" if response else "выгружен")
+                           + " в WooCommerce")
         else:
-            logger.error(f"❌ Ошибка выгрузки `{spu.title}`: {result.get('message', result)}")
+            error = str(result.get('message', result))
+            logger.error(f"❌ Ошибка выгрузки `{spu.title}`: {error}")
     except Exception as e:
+        error = str(e)
         logger.error(f"❗ Ошибка при выгрузке `{spu.title}`: {e}")
         logger.exception(e)
+    return UploadResult(spu_id=spu.id_, title=spu.title, ok=ok,
+                        duration=time.perf_counter() - started, error=error, product_id=product_id)
 
 
-async def upload_all_spus_to_woocommerce(*,
-                                         spus: list[SPU],
-                                         config: dict,
-                                         client,
-                                         mapper,
-                                         ):
-    logger.info(f'Началась выгрузка в WooCommerce {len(spus)} товаров')
+async def process_spu_batch(spus: list, config, mapper, client, priced: bool = False) -> list[UploadResult]:
+    """
+    Выгружает несколько SPU одним пакетом (`products/batch`). Длительность у всех SPU пакета общая.
+    """
+    started = time.perf_counter()
+    items, ready = [], []
+    results: list[UploadResult] = []
+    if not priced:
+        spus, failed = PricingEngine.from_config(config).price_spus_safe(spus)
+        results.extend(UploadResult(spu_id=spu.id_, title=spu.title, ok=False,
+                                    duration=time.perf_counter() - started, error=str(e))
+                       for spu, e in failed)
     for spu in spus:
-        await process_spu(spu, config, mapper,client)
-    # tasks = [
-    #     process_spu(spu, config, mapper, client, )
-    #     for spu in spus
-    # ]
-    # await asyncio.gather(*tasks, return_exceptions=True)
+        try:
+            items.append(mapper.from_domain_to_woocomerce(spu))
+            ready.append(spu)
+        except Exception as e:
+            logger.error(f"❗ Ошибка при подготовке `{spu.title}`: {e}")
+            results.append(UploadResult(spu_id=spu.id_, title=spu.title, ok=False,
+                                        duration=time.perf_counter() - started, error=str(e)))
+    try:
+        responses = await client.bulk_create_or_update_variable_products(items) if items else []
+    except Exception as e:
+        logger.error(f"❗ Ошибка пакетной выгрузки ({len(items)} товаров): {e}")
+        logger.exception(e)
+        responses = [(None, {"message": str(e)})] * len(items)
+    duration = time.perf_counter() - started
+    for spu, (status, result) in zip(ready, responses):
+        if status in [200, 201]:
+            logger.success(f"📤 `{spu.title}` успешно выгружен в WooCommerce")
+            results.append(UploadResult(spu_id=spu.id_, title=spu.title, ok=True, duration=duration,
+                                        product_id=result.get('id')))
+        else:
+            error = str(result.get('message', result)) if isinstance(result, dict) else str(result)
+            logger.error(f"❌ Ошибка выгрузки `{spu.title}`: {error}")
+            results.append(UploadResult(spu_id=spu.id_, title=spu.title, ok=False, duration=duration,
+                                        error=error))
+    return results
+
+
+async def upload_spus_from_queue(*,
+                                 queue: asyncio.Queue,
+                                 config: dict,
+                                 client,
+                                 mapper,
+                                 concurrency: int,
+                                 priced: bool = False,
+                                 batch_size: int = 1,
+                                 on_result=None,
+                                 price_only: set = None,
+                                 ) -> list[UploadResult]:
+    """
+    Пул воркеров выгрузки: читает SPU из очереди, пока каждый воркер не получит `None`.
+    Тот, кто наполняет очередь, должен положить по одному `None` на воркер.
+
+    :param batch_size: при значении больше 1 воркер забирает из очереди до `batch_size` уже готовых SPU
+        и выгружает их одним пакетом через `products/batch`
+    :param on_result: async-функция, вызывается для каждого результата выгрузки (например, для журнала запуска)
+    :param price_only: spu_id товаров, у которых обновляются только цены и наличие (см. `process_spu`);
+        такие товары выгружаются по одному и в пакеты не попадают
+    """
+    price_only = price_only if price_only is not None else set()
+    results: list[UploadResult] = []
+
+    async def collect(batch_results: list[UploadResult]):
+        results.extend(batch_results)
+        if on_result:
+            for result in batch_results:
+                await on_result(result)
+
+    async def worker():
+        while True:
+            spu = await queue.get()
+            if spu is None:
+                return
+            if batch_size <= 1 or spu.id_ in price_only:
+                await collect([await process_spu(spu, config, mapper, client, priced=priced,
+                                           price_only=spu.id_ in price_only)])
+                continue
+            batch, prices_batch, finished = [spu], [], False
+            while len(batch) < batch_size and not queue.empty():
+                next_spu = queue.get_nowait()
+                if next_spu is None:
+                    finished = True
+                    break
+                (prices_batch if next_spu.id_ in price_only else batch).append(next_spu)
+            await collect(await process_spu_batch(batch, config, mapper, client, priced=priced))
+            for next_spu in prices_batch:
+                await collect([await process_spu(next_spu, config, mapper, client, priced=priced, price_only=True)])
+            if finished:
+                return
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return results
+
+
+def log_upload_summary(results: list[UploadResult], duration: float):
+    failed = [r for r in results if not r.ok]
+    logger.info(f'Выгрузка завершена за {duration:.1f} сек.: '
+                f'успешно {len(results) - len(failed)}, с ошибкой {len(failed)}')
+    for r in results:
+        logger.debug(f"  {'ok' if r.ok else 'failed'} `{r.title}`(id={r.spu_id}) {r.duration:.1f} сек."
+                     + (f": {r.error}" if r.error else ''))
+
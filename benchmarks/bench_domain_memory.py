@@ -0,0 +1,81 @@
+"""
+Замер памяти доменной модели: сколько байт занимает один SPU вместе с SKU.
+Для сравнения замеряется и прежняя модель (обычные классы с __dict__, строки вариантов
+без интернирования, характеристики списком словарей) — её строит тот же SPUMapper.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_domain_memory [количество SPU] [размеров на SPU]
+"""
+import gc
+import json
+import sys
+import tracemalloc
+from unittest import mock
+
+from infrastracture import mappers
+from infrastracture.mappers import SPUMapper
+from tests.support.factories import make_product_info
+
+
+class LegacySKU:
+    # Модель до перехода на __slots__
+    def __init__(self, id_: int = None, sku_code: str = None, regular_price: int = None,
+                 vars_: dict[str:str] = None):
+        self.vars = vars_ or {}
+        self.regular_price = regular_price
+        self.sku_code = sku_code
+        self.id = id_
+
+
+class LegacySPU:
+    def __init__(self, id_: int, title: str = None, desc: str = None,
+                 article_code: str = None, min_price: int = None,
+                 max_price: int = None, skus: list = None,
+                 images: list[str] = None, category_id: int = None,
+                 source_url: str = None, brand_name: str = None,
+                 specs: list = None):
+        self.brand_name = brand_name
+        self.source_url = source_url
+        # Прежний маппер передавал характеристики списком словарей {ключ: значение}
+        self.specs = [{key: value} for key, value in specs or []]
+        self.images = images if images is not None else []
+        self.max_price = max_price
+        self.min_price = min_price
+        self.article_code = article_code
+        self.desc = desc
+        self.title = title
+        self.id_ = id_
+        self.skus: list = skus if skus is not None else []
+        self.category_id = category_id
+
+    def add_sku(self, sku):
+        self.skus.append(sku)
+
+
+def measure_legacy(count: int, sizes: int) -> float:
+    with mock.patch.object(mappers, "SPU", LegacySPU), mock.patch.object(mappers, "SKU", LegacySKU):
+        return measure(count, sizes)
+
+
+def measure(count: int, sizes: int) -> float:
+    # Ответы храним как JSON-текст, чтобы строки из ответа, на которые ссылаются SPU, попали в замер
+    raw_payloads = [json.dumps(make_product_info(spu_id, sizes)) for spu_id in range(1, count + 1)]
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    spus = [SPUMapper.from_poizon_to_domain(json.loads(raw)) for raw in raw_payloads]
+    # Разобранные ответы уже освобождены — в памяти остаются только доменные объекты
+    gc.collect()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    return allocated / len(spus)
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    sizes = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    legacy, current = measure_legacy(count, sizes), measure(count, sizes)
+    print(f"{count} SPU по {sizes} размеров, байт на SPU:")
+    print(f"  прежняя модель (__dict__): {legacy:>10,.0f}")
+    print(f"  __slots__ + интернирование: {current:>9,.0f} ({current / legacy:.0%})")
@@ -0,0 +1,43 @@
+"""
+Бенчмарк SPUMapper (timeit) в обе стороны: Poizon -> домен и домен -> WooCommerce.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_mappers [каталог с записанными ответами product-info *.json]
+
+Без аргумента используются сохранённые ответы из tests/fixtures/product_info
+и синтетические ответы разного размера. Совпадение с прежней реализацией проверяет tests/test_mappers.py.
+"""
+import json
+import sys
+import timeit
+from pathlib import Path
+
+from infrastracture.mappers import SPUMapper
+from tests.support.factories import make_product_info
+
+FIXTURES_DIR = Path(__file__).resolve().parent.parent / "tests" / "fixtures" / "product_info"
+
+
+def load_payloads(directory: Path) -> dict[str, dict]:
+    return {path.name: json.loads(path.read_text(encoding="utf-8")) for path in sorted(directory.glob("*.json"))}
+
+
+def run(payloads: dict[str, dict], number: int = 200):
+    print(f"{'payload':<36}{'skus':>6}{'poizon->domain, мкс':>22}{'domain->woo, мкс':>20}")
+    for name, payload in payloads.items():
+        spu = SPUMapper.from_poizon_to_domain(payload)
+        to_domain = min(timeit.repeat(lambda: SPUMapper.from_poizon_to_domain(payload),
+                                      number=number, repeat=5)) / number
+        to_woo = min(timeit.repeat(lambda: SPUMapper.from_domain_to_woocomerce(spu),
+                                   number=number, repeat=5)) / number
+        print(f"{name:<36}{len(spu.skus):>6}{to_domain * 1e6:>22.1f}{to_woo * 1e6:>20.1f}")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        payloads = load_payloads(Path(sys.argv[1]))
+    else:
+        payloads = load_payloads(FIXTURES_DIR)
+        payloads.update({f"synthetic-{sizes}x{dims}": make_product_info(1, sizes, dims)
+                         for sizes, dims in [(10, 2), (30, 3), (60, 5)]})
+    run(payloads)
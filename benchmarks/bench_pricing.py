@@ -0,0 +1,51 @@
+"""
+Бенчмарк PricingEngine (timeit): пересчёт цен пачек SKU разного размера.
+
+Сравниваются прежний подход (корутина на каждый SKU с разбором режима при каждом вызове),
+поштучный `PricingEngine.price` и пакетный `PricingEngine.price_many` (NumPy, если установлен).
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_pricing [режим thepoizon|dewu]
+"""
+import asyncio
+import random
+import sys
+import timeit
+
+from application import pricing
+from application.pricing import PricingEngine
+
+
+async def legacy_calculate_price(value: int, *, mode: str, x: int, y: int, z: int) -> int:
+    # Прежний domain.calculate_price, для сравнения
+    price = value // 100
+    if mode == 'thepoizon':
+        price = round(price * 0.8)
+    elif mode == 'dewu':
+        price = round((price - 2632) // 15.82 + x + y + z)
+    return price
+
+
+def run(mode: str, sizes=(20, 500, 10000), number: int = 20):
+    engine = PricingEngine(mode, x=100, y=500, z=1000)
+    random.seed(0)
+    print(f"режим {mode}, NumPy: {'да' if pricing.np is not None else 'нет'}")
+    print(f"{'skus':>8}{'корутина/SKU, мкс':>20}{'price, мкс':>14}{'price_many, мкс':>18}")
+    for size in sizes:
+        values = [random.randint(300_000, 20_000_000) for _ in range(size)]
+
+        async def legacy():
+            return [await legacy_calculate_price(v, mode=mode, x=100, y=500, z=1000) for v in values]
+
+        loop = asyncio.new_event_loop()
+        timings = [
+            min(timeit.repeat(lambda: loop.run_until_complete(legacy()), number=number, repeat=3)),
+            min(timeit.repeat(lambda: [engine.price(v) for v in values], number=number, repeat=3)),
+            min(timeit.repeat(lambda: engine.price_many(values), number=number, repeat=3)),
+        ]
+        loop.close()
+        print(f"{size:>8}" + "".join(f"{t / number * 1e6:>{w}.1f}" for t, w in zip(timings, (20, 14, 18))))
+
+
+if __name__ == '__main__':
+    run(sys.argv[1] if len(sys.argv) > 1 else 'thepoizon')
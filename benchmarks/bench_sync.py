@@ -0,0 +1,99 @@
+"""
+Сквозной бенчмарк синхронизации на локальных заглушках Poizon и WooCommerce.
+
+Запускает тот же сценарий, что и `main.main` (прогрев справочников, скан каталога,
+конвейер по брендам), и выводит SPU/мин, запросов на SPU и пиковую память.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_sync --brands 3 --catalog-size 60 --latency 0.05 --error-rate 0.01
+"""
+import argparse
+import asyncio
+import resource
+import time
+import tracemalloc
+
+from loguru import logger
+
+import main
+from infrastracture.rate_limiter import AdaptiveRateLimiter
+from infrastracture.thepoizon_client import ThePoizonClient
+from infrastracture.woo_client import AsyncWooClient, SYNC_HASH_META_KEY
+from tests.support.fake_servers import FakePoizonServer, FakeWooServer
+
+
+async def run(args) -> dict:
+    brands = {f"Brand{n}": [n] for n in range(1, args.brands + 1)}
+    poizon = FakePoizonServer(brands=brands, catalog_size=args.catalog_size, sizes=args.sizes,
+                              latency=args.latency, error_rate=args.error_rate)
+    woo = FakeWooServer(latency=args.latency, error_rate=args.error_rate)
+    await poizon.start()
+    await woo.start()
+    # Товары «прошлого топа»: есть в магазине, но за пределами нового топа
+    for brand_name in brands:
+        for spu_id in poizon.spu_ids(brand_name)[-args.existing:] if args.existing else []:
+            woo.add_product(sku=f"ART-{spu_id}", brand_name=brand_name, spu_id=spu_id)
+
+    woo_client = AsyncWooClient(url=woo.url, consumer_key="ck", consumer_secret="cs")
+    await woo_client.init_session()
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        await woo_client.warm_reference_cache()
+        async with ThePoizonClient(api_key="bench", base_url=poizon.base_url,
+                                   rate_limiter=AdaptiveRateLimiter(rate=args.rate, max_rate=args.rate * 5)
+                                   ) as pz_client:
+            await main.sync_all_brands(pz_client=pz_client, woo_client=woo_client,
+                                       concurrency=args.concurrency, brands=brands)
+    finally:
+        duration = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        await woo_client.close()
+        await poizon.stop()
+        await woo.stop()
+
+    # Синхронизированными считаем товары, у которых записан хэш выгрузки
+    spus = max(1, sum(1 for product in woo.products.values()
+                      if woo_client.get_meta_value(product, SYNC_HASH_META_KEY)))
+    return {
+        "duration": duration,
+        "spus": spus,
+        "poizon_requests": poizon.requests,
+        "woo_requests": woo.requests,
+        "peak_traced": peak,
+        "max_rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+    }
+
+
+def report(result: dict):
+    spus = result["spus"]
+    requests_total = sum(result["poizon_requests"].values()) + sum(result["woo_requests"].values())
+    print(f"Время: {result['duration']:.1f} сек., синхронизировано SPU: {spus}")
+    print(f"SPU/мин: {spus / result['duration'] * 60:.1f}")
+    print(f"Запросов на SPU: {requests_total / spus:.1f} "
+          f"(Poizon {sum(result['poizon_requests'].values()) / spus:.1f}, "
+          f"WooCommerce {sum(result['woo_requests'].values()) / spus:.1f})")
+    print(f"Пиковая память: {result['peak_traced'] / 2 ** 20:.1f} МБ (tracemalloc), "
+          f"{result['max_rss'] / 2 ** 20:.1f} МБ (RSS)")
+    for name, counter in (("Poizon", result["poizon_requests"]), ("WooCommerce", result["woo_requests"])):
+        print(f"{name}:")
+        for endpoint, count in counter.most_common():
+            print(f"  {count:>6}  {endpoint}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--brands", type=int, default=3, help="количество брендов")
+    parser.add_argument("--catalog-size", type=int, default=100, help="товаров на бренд в Poizon")
+    parser.add_argument("--existing", type=int, default=10, help="товаров прошлого топа на бренд в магазине")
+    parser.add_argument("--sizes", type=int, default=20, help="размеров на товар")
+    parser.add_argument("--latency", type=float, default=0.05, help="задержка ответа заглушек, сек.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="доля ответов 503")
+    parser.add_argument("--rate", type=float, default=20.0, help="начальная скорость запросов к Poizon, запр/сек")
+    parser.add_argument("--concurrency", type=int, default=3, help="брендов одновременно")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(lambda msg: print(msg, end=""), level="WARNING")
+    report(asyncio.run(run(args)))
@@ -1,4 +1,16 @@
+import heapq
+import itertools
+import sys
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
 class SKU:
+    # __slots__ и интернированные строки вариантов: SKU создаются тысячами за запуск
+    __slots__ = ('vars', 'regular_price', 'sku_code', 'id')
+
     def __init__(self,
                  id_: int = None,
                  sku_code: str = None,
@@ -6,29 +18,36 @@ class SKU:
                  vars_: dict[str:str] = None):
         if not vars_:
             vars_ = {}
-        self.vars = vars_
+        self.vars = {_intern(key): _intern(value) for key, value in vars_.items()}
         self.regular_price = regular_price
         self.sku_code = sku_code
         self.id = id_
 
 
 class SPU:
+    __slots__ = ('brand_name', 'source_url', 'specs', 'images', 'max_price', 'min_price',
+                 'article_code', 'desc', 'title', 'id_', 'skus', 'category_id')
+
     def __init__(self, id_: int, title: str = None, desc: str = None,
                  article_code: str = None, min_price: int = None,
                  max_price: int = None, skus: list[SKU] = None,
                  images: list[str] = None, category_id: int = None,
                  source_url: str = None, brand_name: str = None,
-                 specs:list=None):
+                 specs: list = None):
         self.brand_name = brand_name
         self.source_url = source_url
         if skus is None:
             skus = []
         if specs is None:
-            specs = []
+            specs = ()
         if images is None:
-            images = []
-        self.specs = specs
-        self.images = images
+            images = ()
+        # Характеристики храним как кортеж пар (ключ, значение); словари вида {ключ: значение} тоже принимаются
+        self.specs: tuple[tuple[str, str], ...] = tuple(
+            (_intern(key), value) for key, value in
+            (next(iter(spec.items())) if isinstance(spec, dict) else spec for spec in specs)
+        )
+        self.images = tuple(images)
         self.max_price = max_price
         self.min_price = min_price
         self.article_code = article_code
@@ -58,12 +77,51 @@ class ScoringService:
         if spu.min_price and spu.min_price > 400:
             score += 1
 
-        if any(word in spu.title for word in self.config["bonus_keywords"]):
+        if spu.title and any(word in spu.title for word in self.config["bonus_keywords"]):
             score += 1
 
         return score
 
 
+class TopNSelector:
+    """
+    Потоковый отбор `n` лучших элементов: ограниченная куча (min-heap) размера `n`.
+    Оценка `key` считается один раз на элемент; при равной оценке выше тот, что добавлен раньше.
+    """
+
+    def __init__(self, n: int, key):
+        self.n = n
+        self.key = key
+        self._heap: list[tuple] = []
+        self._counter = itertools.count()
+
+    def __len__(self):
+        return len(self._heap)
+
+    def push(self, item) -> bool:
+        """
+        :return: попал ли элемент в текущие `n` лучших
+        """
+        if self.n <= 0:
+            return False
+        entry = (self.key(item), -next(self._counter), item)
+        if len(self._heap) < self.n:
+            heapq.heappush(self._heap, entry)
+            return True
+        if entry[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, entry)
+            return True
+        return False
+
+    def drain(self) -> list:
+        """
+        Возвращает отобранные элементы от лучшего к худшему и очищает селектор.
+        """
+        entries = sorted(self._heap, key=lambda entry: entry[:2], reverse=True)
+        self._heap = []
+        return [item for *_, item in entries]
+
+
 class SPUCollector:
     def __init__(self, spus: list[SPU] = None):
         if not spus:
@@ -74,23 +132,8 @@ class SPUCollector:
         self.spus.append(spu)
 
     def top_n(self, scoring_service: ScoringService, n: int = 50) -> list[SPU]:
-        return sorted(self.spus, key=lambda spu: scoring_service.score(spu), reverse=True)[:n]
-
-
-# @lru_cache(maxsize=256, )
-async def calculate_price(sku_regular_price: int, *, mode: str, x: int, y: int, z: int) -> int:
-    # TODO: вынести app layer
-    price = sku_regular_price // 100
-    if mode == 'thepoizon':
-        price = round(price * 0.8)
-    elif mode == 'dewu':
-        price = (price - 2632) // 15.82
-
-        price = \
-            round(
-                price +
-                x +
-                y +
-                z
-            )
-    return price
+        selector = TopNSelector(n, key=scoring_service.score)
+        for spu in self.spus:
+            selector.push(spu)
+        return selector.drain()
+
@@ -19,12 +19,7 @@ class SPUMapper:
             "images": [{'src': url_image} for url_image in spu.images],
             "brand": BrandNormalizer.normalize_brand(raw_brand=spu.brand_name,
                                                      title=spu.title),
-            "description": '\n'.join(
-                [': '.join(
-                    [
-                        next(iter((spec.keys()))), next(iter(spec.values()))
-                    ]
-                ) for spec in spu.specs])
+            "description": '\n'.join(f'{key}: {value}' for key, value in spu.specs)
         }
         variations = []
         for sku in spu.skus:
@@ -47,13 +42,29 @@ class SPUMapper:
             })
         return spu_data, variations
 
+    @staticmethod
+    def _build_property_index(data: dict) -> dict[tuple, list[tuple[str, str]]]:
+        """
+        Индекс свойств продажи: (level, propertyValueId) -> [(ключ варианта, значение), ...].
+        Строится один раз на товар, порядок совпадений сохраняется.
+        """
+        index: dict[tuple, list[tuple[str, str]]] = {}
+        for sale_prop in data.get('buyDialogModel', {}).get('saleProperties', []):
+            level = sale_prop.get('level')
+            for prop_ in sale_prop.get('propertyList', []):
+                prop_key = prop_['propertyKey'].lower()
+                for prop_item_model in prop_.get('propertyItemModels', {}):
+                    name = prop_item_model['name'].lower()
+                    name = SPUMapper.RU_ENG.get(name, name)
+                    index.setdefault((level, prop_item_model.get('propertyValueId')), []).append(
+                        (f"{prop_key}_{name}", prop_item_model['value']))
+        return index
+
     @staticmethod
     def from_poizon_to_domain(data: dict) -> SPU:
         article_number = [prop.get("value") for prop in data.get('baseProperties', []) if
                           prop.get('itemType') == 'ARTICLE_NUMBER']
-        specs = []
-        for base_prop in data.get('baseProperties', []):
-            specs.append({base_prop['key']: base_prop['value']})
+        specs = [(base_prop['key'], base_prop['value']) for base_prop in data.get('baseProperties', [])]
         d_spu = SPU(title=data.get('shareInfo', {}).get('shareTitle'),
                     desc=None,
                     id_=data.get('buyDialogModel', {}).get('detail', {}).get('spuId'),
@@ -68,20 +79,12 @@ class SPUMapper:
                     )
         if d_spu.brand_name == '':
             d_spu.brand_name = None
+        property_index = SPUMapper._build_property_index(data)
         for pz_sku in data.get('buyDialogModel', {}).get('skus', []):
             vars_ = {}
             for prop in pz_sku.get('properties', []):
-                level = prop.get('level')
-                prop_val_id = prop.get('propertyValueId')
-                for sale_prop in data.get('buyDialogModel', {}).get('saleProperties', []):
-                    for prop_ in sale_prop.get('propertyList', []):
-                        for prop_item_model in prop_.get('propertyItemModels', {}):
-                            if level == sale_prop.get('level') and prop_item_model.get(
-                                    'propertyValueId') == prop_val_id:
-                                name = prop_item_model['name'].lower()
-                                name = SPUMapper.RU_ENG.get(name, name)
-                                vars_.update(
-                                    {f"{prop_['propertyKey'].lower()}_{name}": prop_item_model['value'], })
+                for key, value in property_index.get((prop.get('level'), prop.get('propertyValueId')), ()):
+                    vars_[key] = value
             regular_price = pz_sku.get('skuSpeedInfo', [{}])[0].get('speedPrice', {}).get('money', {}).get('minUnitVal')
 
             if regular_price and 'eu_size' in vars_:
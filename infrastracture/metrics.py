@@ -0,0 +1,140 @@
+import json
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_ID_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+
+def endpoint_template(path: str) -> str:
+    """
+    `products/123/variations` -> `products/{id}/variations`, чтобы метрики не дробились по ID.
+    """
+    return _ID_SEGMENT.sub("/{id}", "/" + path.lstrip("/")).lstrip("/")
+
+
+class EndpointStats:
+    __slots__ = ('count', 'retries', 'bytes', 'latency_sum', 'buckets', 'statuses')
+
+    def __init__(self):
+        self.count = 0
+        self.retries = 0
+        self.bytes = 0
+        self.latency_sum = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.statuses: Counter = Counter()
+
+    def observe(self, status: int | str, latency: float, size: int):
+        self.count += 1
+        self.bytes += size
+        self.latency_sum += latency
+        self.statuses[str(status)] += 1
+        index = next((i for i, bound in enumerate(LATENCY_BUCKETS) if latency <= bound), len(LATENCY_BUCKETS))
+        self.buckets[index] += 1
+
+
+class RunMetrics:
+    """
+    Метрики одного запуска: запросы по клиентам и эндпоинтам (количество, латентность,
+    байты, повторы, статусы) и длительность этапов (сбор, сверка, выгрузка).
+    """
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.endpoints: dict[tuple[str, str, str], EndpointStats] = {}
+        self.stages: dict[str, list[float]] = {}
+        self.counters: Counter = Counter()
+
+    def _stats(self, client: str, method: str, endpoint: str) -> EndpointStats:
+        key = (client, method, endpoint_template(endpoint))
+        stats = self.endpoints.get(key)
+        if stats is None:
+            stats = self.endpoints[key] = EndpointStats()
+        return stats
+
+    def record_request(self, client: str, method: str, endpoint: str, *,
+                       status: int | str, latency: float, size: int = 0):
+        self._stats(client, method, endpoint).observe(status, latency, size)
+
+    def record_retry(self, client: str, method: str, endpoint: str):
+        self._stats(client, method, endpoint).retries += 1
+
+    def increment(self, name: str, value: int = 1):
+        self.counters[name] += value
+
+    def record_stage(self, name: str, duration: float):
+        self.stages.setdefault(name, []).append(duration)
+
+    @contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_stage(name, time.perf_counter() - started)
+
+    def summary(self) -> dict:
+        return {
+            "started_at": self.started_at,
+            "duration": time.time() - self.started_at,
+            "requests": [
+                {
+                    "client": client, "method": method, "endpoint": endpoint,
+                    "count": stats.count, "retries": stats.retries, "bytes": stats.bytes,
+                    "latency_avg": stats.latency_sum / stats.count if stats.count else 0.0,
+                    "latency_buckets": dict(zip([*map(str, LATENCY_BUCKETS), "+Inf"], stats.buckets)),
+                    "statuses": dict(stats.statuses),
+                }
+                for (client, method, endpoint), stats in sorted(self.endpoints.items())
+            ],
+            "stages": {
+                name: {"count": len(durations), "total": sum(durations), "max": max(durations)}
+                for name, durations in self.stages.items()
+            },
+            "counters": dict(self.counters),
+        }
+
+    def to_prometheus(self) -> str:
+        # В текстовом формате Prometheus строки одной метрики должны идти подряд после её TYPE
+        endpoints = [(f'client="{client}",method="{method}",endpoint="{endpoint}"', stats)
+                     for (client, method, endpoint), stats in sorted(self.endpoints.items())]
+        lines = ["# TYPE poizon_sync_requests_total counter"]
+        for labels, stats in endpoints:
+            for status, count in sorted(stats.statuses.items()):
+                lines.append(f'poizon_sync_requests_total{{{labels},status="{status}"}} {count}')
+        lines.append("# TYPE poizon_sync_request_retries_total counter")
+        for labels, stats in endpoints:
+            lines.append(f"poizon_sync_request_retries_total{{{labels}}} {stats.retries}")
+        lines.append("# TYPE poizon_sync_response_bytes_total counter")
+        for labels, stats in endpoints:
+            lines.append(f"poizon_sync_response_bytes_total{{{labels}}} {stats.bytes}")
+        lines.append("# TYPE poizon_sync_request_duration_seconds histogram")
+        for labels, stats in endpoints:
+            cumulative = 0
+            for bound, count in zip([*map(str, LATENCY_BUCKETS), "+Inf"], stats.buckets):
+                cumulative += count
+                lines.append(f'poizon_sync_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"poizon_sync_request_duration_seconds_sum{{{labels}}} {stats.latency_sum:.6f}")
+            lines.append(f"poizon_sync_request_duration_seconds_count{{{labels}}} {stats.count}")
+        lines.append("# TYPE poizon_sync_stage_duration_seconds summary")
+        for name, durations in sorted(self.stages.items()):
+            lines.append(f'poizon_sync_stage_duration_seconds_sum{{stage="{name}"}} {sum(durations):.6f}')
+            lines.append(f'poizon_sync_stage_duration_seconds_count{{stage="{name}"}} {len(durations)}')
+        lines.append("# TYPE poizon_sync_events_total counter")
+        for name, value in sorted(self.counters.items()):
+            lines.append(f'poizon_sync_events_total{{event="{name}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+    def write(self, *, json_path: str | Path = None, prometheus_path: str | Path = None):
+        if json_path:
+            Path(json_path).write_text(json.dumps(self.summary(), ensure_ascii=False, indent=2), encoding="utf-8")
+        if prometheus_path:
+            Path(prometheus_path).write_text(self.to_prometheus(), encoding="utf-8")
+
+
+# Общие метрики процесса: клиенты и use cases пишут сюда, main выгружает в конце запуска
+run_metrics = RunMetrics()
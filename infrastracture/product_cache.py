@@ -0,0 +1,110 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+
+from loguru import logger
+
+
+class ProductInfoCache:
+    """
+    Локальный SQLite-кэш ответов `poizon-api/product-info/{spu_id}`.
+
+    - У каждой записи свой TTL (`ttl` на момент записи), после него запись удаляется.
+    - Размер ограничен `max_entries`: при переполнении вытесняются давно не читанные записи (LRU).
+    - `price_ttl` — режим свежести «только цены»: цены меняются чаще остального содержимого,
+      поэтому запись старше `price_ttl` не отдаётся как свежая и товар запрашивается заново.
+      При этом до истечения `ttl` она остаётся запасной копией, если API не ответил.
+
+    Из асинхронного кода кэш вызывается через `aget`/`aset`: запросы к SQLite выполняются в потоке
+    и не блокируют event loop. Вытеснение проверяется раз в `EVICT_EVERY` записей.
+    """
+    EVICT_EVERY = 100
+
+    def __init__(self, path: str | Path = "cache/product_info.sqlite3", *,
+                 ttl: float = 24 * 3600,
+                 max_entries: int = 20000,
+                 price_ttl: float = None):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.price_ttl = price_ttl
+        # Соединение используется из потоков asyncio.to_thread, доступ к нему — под блокировкой
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._writes_since_evict = 0
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS product_info ("
+            " spu_id TEXT PRIMARY KEY,"
+            " payload BLOB NOT NULL,"
+            " fetched_at REAL NOT NULL,"
+            " expires_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_product_info_accessed ON product_info (accessed_at)")
+        self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    async def aget(self, spu_id, *, allow_stale_prices: bool = False) -> dict | None:
+        return await asyncio.to_thread(self.get, spu_id, allow_stale_prices=allow_stale_prices)
+
+    async def aset(self, spu_id, data: dict, *, ttl: float = None):
+        await asyncio.to_thread(self.set, spu_id, data, ttl=ttl)
+
+    def get(self, spu_id, *, allow_stale_prices: bool = False) -> dict | None:
+        """
+        Возвращает закэшированный ответ или None.
+
+        :param allow_stale_prices: отдать запись, даже если истёк `price_ttl` (но не `ttl`)
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, fetched_at, expires_at FROM product_info WHERE spu_id = ?", (str(spu_id),)
+            ).fetchone()
+            if row is None:
+                return None
+            payload, fetched_at, expires_at = row
+            if expires_at <= now:
+                self._conn.execute("DELETE FROM product_info WHERE spu_id = ?", (str(spu_id),))
+                self._conn.commit()
+                return None
+            if self.price_ttl is not None and not allow_stale_prices and now - fetched_at > self.price_ttl:
+                return None
+            self._conn.execute("UPDATE product_info SET accessed_at = ? WHERE spu_id = ?", (now, str(spu_id)))
+            self._conn.commit()
+        return json.loads(zlib.decompress(payload))
+
+    def set(self, spu_id, data: dict, *, ttl: float = None):
+        now = time.time()
+        payload = zlib.compress(json.dumps(data, ensure_ascii=False).encode("utf-8"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO product_info (spu_id, payload, fetched_at, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (str(spu_id), payload, now, now + (self.ttl if ttl is None else ttl), now)
+            )
+            self._writes_since_evict += 1
+            if self._writes_since_evict >= self.EVICT_EVERY:
+                self._writes_since_evict = 0
+                self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        # Вызывается под self._lock
+        count = self._conn.execute("SELECT COUNT(*) FROM product_info").fetchone()[0]
+        if count <= self.max_entries:
+            return
+        self._conn.execute(
+            "DELETE FROM product_info WHERE spu_id IN "
+            "(SELECT spu_id FROM product_info ORDER BY accessed_at LIMIT ?)",
+            (count - self.max_entries,)
+        )
+        logger.debug(f"[product_cache] Вытеснено {count - self.max_entries} записей")
@@ -0,0 +1,65 @@
+import asyncio
+import time
+
+from loguru import logger
+
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket с AIMD-регулировкой скорости.
+
+    Пока ответы успешные, скорость растёт аддитивно (на `increase` запросов/сек каждую секунду),
+    при 429/5xx — уменьшается мультипликативно (в `decrease` раз), но не чаще раза в `cooldown` сек.
+    """
+    THROTTLE_STATUSES = {429, 500, 502, 503, 504}
+
+    def __init__(self, rate: float = 2.0, *,
+                 min_rate: float = 0.5,
+                 max_rate: float = 10.0,
+                 increase: float = 0.5,
+                 decrease: float = 0.5,
+                 burst: float = 1.0,
+                 cooldown: float = 1.0):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.burst = burst
+        self.cooldown = cooldown
+        self._tokens = burst
+        self._updated_at = time.monotonic()
+        self._last_decrease = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    async def acquire(self):
+        async with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+    def on_response(self, status: int):
+        if status in self.THROTTLE_STATUSES:
+            self.on_throttle()
+        elif 200 <= status < 300:
+            self.on_success()
+
+    def on_success(self):
+        # +increase запросов/сек за каждую секунду успешной работы
+        self.rate = min(self.max_rate, self.rate + self.increase / self.rate)
+
+    def on_throttle(self):
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown:
+            return
+        self._last_decrease = now
+        self.rate = max(self.min_rate, self.rate * self.decrease)
+        self._tokens = 0
+        logger.warning(f"[rate_limiter] Сервер ограничивает запросы, снижаем скорость до {self.rate:.2f} запр/сек")
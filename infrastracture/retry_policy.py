@@ -0,0 +1,174 @@
+import asyncio
+import random
+import time
+from email.utils import parsedate_to_datetime
+
+import aiohttp
+from loguru import logger
+
+
+class RetryableHTTPError(Exception):
+    """
+    Ответ сервера, после которого запрос имеет смысл повторить (429, 5xx...).
+    """
+
+    def __init__(self, status: int, message: str = "", retry_after: float = None):
+        super().__init__(f"HTTP {status}: {message}")
+        self.status = status
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(Exception):
+    """
+    Хост недоступен: circuit breaker открыт, запрос не отправляется.
+    """
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """
+    Заголовок Retry-After: число секунд или HTTP-дата.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitBreaker:
+    """
+    После `failure_threshold` ошибок подряд размыкается на `reset_timeout` секунд,
+    затем пропускает один пробный запрос (half-open): успех замыкает цепь, ошибка — снова размыкает.
+    """
+
+    def __init__(self, host: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._probe_in_flight = False
+
+    def before_request(self):
+        if self.opened_at is None:
+            return
+        if time.monotonic() - self.opened_at < self.reset_timeout or self._probe_in_flight:
+            raise CircuitOpenError(f"{self.host} недоступен, запросы временно не отправляются")
+        self._probe_in_flight = True
+
+    def release_probe(self):
+        """
+        Запрос завершился без вывода о состоянии хоста (отмена, 429): пробный слот освобождается,
+        счётчик ошибок не меняется.
+        """
+        self._probe_in_flight = False
+
+    def on_success(self):
+        if self.opened_at is not None:
+            logger.info(f"[circuit] {self.host} снова доступен")
+        self.failures = 0
+        self.opened_at = None
+        self._probe_in_flight = False
+
+    def on_failure(self):
+        self.failures += 1
+        self._probe_in_flight = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            if self.opened_at is None:
+                logger.error(f"[circuit] {self.host}: {self.failures} ошибок подряд, "
+                             f"приостанавливаем запросы на {self.reset_timeout:.0f} сек.")
+            self.opened_at = time.monotonic()
+
+
+class RetryPolicy:
+    """
+    Общая политика повторов для HTTP-клиентов: экспоненциальная задержка с jitter,
+    учёт Retry-After, классификация ошибок и circuit breaker на каждый хост.
+    """
+    RETRY_STATUSES = frozenset({408, 425, 429, 500, 502, 503, 504})
+    # Ответы, которые повторяются, но не считаются отказом хоста: 429 — это ограничение частоты,
+    # сервер жив, а паузу задаёт Retry-After
+    BREAKER_NEUTRAL_STATUSES = frozenset({429})
+
+    def __init__(self, *,
+                 retries: int = 4,
+                 base_delay: float = 1.0,
+                 max_delay: float = 30.0,
+                 failure_threshold: int = 5,
+                 reset_timeout: float = 30.0):
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._breakers: dict[str, CircuitBreaker] = {}
+
+    def breaker(self, host: str) -> CircuitBreaker:
+        breaker = self._breakers.get(host)
+        if breaker is None:
+            breaker = self._breakers[host] = CircuitBreaker(host, self.failure_threshold, self.reset_timeout)
+        return breaker
+
+    def is_retryable_status(self, status: int) -> bool:
+        return status in self.RETRY_STATUSES
+
+    @staticmethod
+    def is_retryable(exc: BaseException) -> bool:
+        return isinstance(exc, (RetryableHTTPError, aiohttp.ClientConnectionError,
+                                aiohttp.ClientPayloadError, asyncio.TimeoutError))
+
+    def counts_as_failure(self, exc: BaseException) -> bool:
+        return getattr(exc, "status", None) not in self.BREAKER_NEUTRAL_STATUSES
+
+    def backoff(self, attempt: int, retry_after: float = None) -> float:
+        if retry_after is not None:
+            return min(self.max_delay, retry_after)
+        # Full jitter: случайная задержка в [0, base * 2^(attempt-1)]
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    async def call(self, host: str, func, *args, on_retry=None, description: str = None, **kwargs):
+        """
+        Вызывает `func(*args, **kwargs)` с повторами по политике.
+
+        :param host: хост для circuit breaker
+        :param on_retry: вызывается перед каждой повторной попыткой
+        """
+        breaker = self.breaker(host)
+        description = description or getattr(func, "__name__", "request")
+        attempt = 0
+        while True:
+            attempt += 1
+            breaker.before_request()
+            try:
+                result = await func(*args, **kwargs)
+            except Exception as e:
+                if not self.is_retryable(e):
+                    # Сервер ответил осмысленной ошибкой (4xx) — хост жив
+                    breaker.on_success()
+                    raise
+                if self.counts_as_failure(e):
+                    breaker.on_failure()
+                else:
+                    breaker.release_probe()
+                if attempt >= self.retries:
+                    logger.error(f"[retry] {description}: все {self.retries} попытки исчерпаны ({e})")
+                    raise
+                delay = self.backoff(attempt, getattr(e, "retry_after", None))
+                logger.warning(f"[retry] {description}: {e}. Попытка {attempt}/{self.retries}, "
+                               f"повтор через {delay:.1f} сек.")
+                await asyncio.sleep(delay)
+                if on_retry:
+                    on_retry()
+                continue
+            except BaseException:
+                # Отмена (CancelledError) не говорит о состоянии хоста, но пробный слот надо освободить,
+                # иначе breaker останется открытым до конца запуска
+                breaker.release_probe()
+                raise
+            breaker.on_success()
+            return result
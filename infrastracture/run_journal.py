@@ -0,0 +1,121 @@
+import asyncio
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from loguru import logger
+
+
+class RunJournal:
+    """
+    Журнал запуска синхронизации в SQLite: какие бренды завершены и какие SPU
+    загружены из Poizon (`fetched`) и выгружены в WooCommerce (`uploaded`, ID товара).
+    Позволяет продолжить прерванный запуск (`--resume`), пропустив уже сделанную работу.
+
+    Отметки по SPU из асинхронного кода пишутся через `amark_fetched`/`amark_uploaded`:
+    запросы к SQLite выполняются в потоке и не блокируют event loop.
+    """
+
+    def __init__(self, path: str | Path = "cache/run_journal.sqlite3"):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Соединение используется из потоков asyncio.to_thread, доступ к нему — под блокировкой
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS runs ("
+            " run_id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " started_at REAL NOT NULL,"
+            " finished_at REAL);"
+            "CREATE TABLE IF NOT EXISTS brands ("
+            " run_id INTEGER NOT NULL,"
+            " brand TEXT NOT NULL,"
+            " finished_at REAL NOT NULL,"
+            " PRIMARY KEY (run_id, brand));"
+            "CREATE TABLE IF NOT EXISTS spus ("
+            " run_id INTEGER NOT NULL,"
+            " spu_id INTEGER NOT NULL,"
+            " brand TEXT,"
+            " fetched_at REAL,"
+            " uploaded_at REAL,"
+            " product_id INTEGER,"
+            " PRIMARY KEY (run_id, spu_id));"
+        )
+        self._conn.commit()
+        self.run_id: int | None = None
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    async def amark_fetched(self, spu_id: int, brand: str):
+        await asyncio.to_thread(self.mark_fetched, spu_id, brand)
+
+    async def amark_uploaded(self, spu_id: int, product_id: int | None):
+        await asyncio.to_thread(self.mark_uploaded, spu_id, product_id)
+
+    def start_run(self, resume: bool = False) -> int:
+        """
+        Начинает новый запуск или, при `resume`, продолжает последний незавершённый.
+        """
+        if resume:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT run_id FROM runs WHERE finished_at IS NULL ORDER BY run_id DESC LIMIT 1"
+                ).fetchone()
+            if row:
+                self.run_id = row[0]
+                logger.info(f"Продолжаем запуск #{self.run_id}: завершено брендов {len(self.finished_brands())}, "
+                            f"выгружено SPU {len(self.uploaded_spu_ids())}")
+                return self.run_id
+            logger.info("Незавершённых запусков нет, начинаем новый")
+        with self._lock:
+            cursor = self._conn.execute("INSERT INTO runs (started_at) VALUES (?)", (time.time(),))
+            self._conn.commit()
+        self.run_id = cursor.lastrowid
+        return self.run_id
+
+    def finish_run(self):
+        with self._lock:
+            self._conn.execute("UPDATE runs SET finished_at = ? WHERE run_id = ?", (time.time(), self.run_id))
+            self._conn.commit()
+
+    def finished_brands(self) -> set[str]:
+        with self._lock:
+            rows = self._conn.execute("SELECT brand FROM brands WHERE run_id = ?", (self.run_id,)).fetchall()
+        return {brand for brand, in rows}
+
+    def mark_brand_finished(self, brand: str):
+        """
+        Бренд больше не обрабатывается при `--resume`. Отмечать только бренды, все SPU которых выгружены.
+        """
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO brands (run_id, brand, finished_at) VALUES (?, ?, ?)",
+                               (self.run_id, brand, time.time()))
+            self._conn.commit()
+
+    def uploaded_spu_ids(self) -> set[int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT spu_id FROM spus WHERE run_id = ? AND uploaded_at IS NOT NULL",
+                                      (self.run_id,)).fetchall()
+        return {spu_id for spu_id, in rows}
+
+    def mark_fetched(self, spu_id: int, brand: str):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO spus (run_id, spu_id, brand, fetched_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (run_id, spu_id) DO UPDATE SET fetched_at = excluded.fetched_at",
+                (self.run_id, spu_id, brand, time.time())
+            )
+            self._conn.commit()
+
+    def mark_uploaded(self, spu_id: int, product_id: int | None):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO spus (run_id, spu_id, uploaded_at, product_id) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (run_id, spu_id) DO UPDATE SET uploaded_at = excluded.uploaded_at, "
+                "product_id = excluded.product_id",
+                (self.run_id, spu_id, time.time(), product_id)
+            )
+            self._conn.commit()
@@ -1,9 +1,16 @@
 import asyncio
+import json
+import time
+from urllib.parse import urlparse
 
-from aiohttp import ClientSession, ClientResponseError
+from aiohttp import ClientSession
 from loguru import logger
 
 from application.interfaces import PoizonClient
+from infrastracture.metrics import run_metrics
+from infrastracture.product_cache import ProductInfoCache
+from infrastracture.rate_limiter import AdaptiveRateLimiter
+from infrastracture.retry_policy import RetryPolicy, RetryableHTTPError, parse_retry_after
 
 '''
 categoryIds:
@@ -48,11 +55,20 @@ class ThePoizonClient(PoizonClient):
     def __init__(self,
                  api_key: str,
                  base_url: str = "https://poizon-api.com/api/poizon-ru/",
-                 sleep_sec: float = 0.5,
+                 max_concurrency: int = 5,
+                 rate_limiter: AdaptiveRateLimiter = None,
+                 cache: ProductInfoCache = None,
+                 retry_policy: RetryPolicy = None,
                  ):
         self.api_key = api_key
         self.base_url = base_url
-        self.sleep_sec = sleep_sec
+        self.host = urlparse(base_url).netloc
+        self.retry_policy = retry_policy or RetryPolicy(retries=5)
+        # Все запросы к API проходят через общий лимитер
+        self.rate_limiter = rate_limiter or AdaptiveRateLimiter()
+        # Общий лимит одновременных запросов деталей для всех брендов
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.cache = cache
         self.session: ClientSession | None = None
 
     async def __aenter__(self):
@@ -64,6 +80,49 @@ class ThePoizonClient(PoizonClient):
 
     async def __aexit__(self, *args):
         await self.session.close()
+        if self.cache:
+            self.cache.close()
+
+    async def _get(self, url: str, params: dict = None) -> dict:
+        """
+        GET с повторами по общей политике (`retry_policy`). Возвращает разобранный JSON.
+        """
+        return await self.retry_policy.call(
+            self.host, self._get_once, url, params=params,
+            description=f"GET {url}",
+            on_retry=lambda: run_metrics.record_retry("poizon", "GET", url),
+        )
+
+    async def _get_once(self, url: str, params: dict = None) -> dict:
+        await self.rate_limiter.acquire()
+        started = time.perf_counter()
+        try:
+            async with self.session.get(url, params=params) as res:
+                body = await res.read()
+                status = res.status
+                retry_after = parse_retry_after(res.headers.get("Retry-After"))
+        except Exception:
+            run_metrics.record_request("poizon", "GET", url, status="error", latency=time.perf_counter() - started)
+            raise
+        run_metrics.record_request("poizon", "GET", url, status=status,
+                                   latency=time.perf_counter() - started, size=len(body))
+        self.rate_limiter.on_response(status)
+        try:
+            data = json.loads(body) if body else None
+        except ValueError:
+            data = None
+        if status == 200:
+            if not isinstance(data, dict):
+                # 200 с HTML-страницей обслуживания или пустым телом — не ответ API: повторяем и не кэшируем
+                raise RetryableHTTPError(status, f"ответ не в формате JSON: {body[:200].decode('utf-8', 'replace')!r}",
+                                         retry_after=retry_after)
+            return data
+        if data is None:
+            data = {"msg": body[:400].decode("utf-8", "replace")}
+        message = data.get('msg', data) if isinstance(data, dict) else data
+        if self.retry_policy.is_retryable_status(status):
+            raise RetryableHTTPError(status, str(message), retry_after=retry_after)
+        raise Exception(f"API вернул {status}: {message}")
 
     async def search_products(self, keyword: str,
                               page: int = 1,
@@ -77,7 +136,7 @@ class ThePoizonClient(PoizonClient):
         if fit_ids is None:  # Men Women Uni
             fit_ids = [1, 2, 3]
         try:
-            res = await self.session.get("poizon-api/search", params={
+            data = await self._get("poizon-api/search", params={
                 "keyword": keyword,
                 "page": page,
                 "pageSize": page_size,
@@ -85,24 +144,27 @@ class ThePoizonClient(PoizonClient):
                 'categoryIds': category_ids,
                 "sortType": 1
             })
-            data = await res.json()
-            if res.status != 200:
-                raise Exception(f"Ошибка поиска товаров на странице: {data.get('msg', data)}")
-            return data.get("searchSpuList", {}).get("spuList", [])
-        except ClientResponseError as e:
+        except Exception as e:
             logger.error(f"Ошибка поиска товаров на странице {page}: {e}")
-            return []
+            raise
+        return data.get("searchSpuList", {}).get("spuList", [])
 
     async def get_product_info(self, spu_id: str) -> dict:
+        if self.cache:
+            cached = await self.cache.aget(spu_id)
+            if cached is not None:
+                logger.trace(f"Товар {spu_id} взят из кэша")
+                return cached
         try:
-            res = await self.session.get(f"poizon-api/product-info/{spu_id}")
-
-            data = await res.json()
-
-            if res.status != 200:
-                raise Exception(data)
-            await asyncio.sleep(self.sleep_sec)
+            async with self._semaphore:
+                data = await self._get(f"poizon-api/product-info/{spu_id}")
+            if self.cache:
+                await self.cache.aset(spu_id, data)
             return data
-        except ClientResponseError as e:
+        except Exception as e:
+            stale = await self.cache.aget(spu_id, allow_stale_prices=True) if self.cache else None
+            if stale is not None:
+                logger.warning(f"API не ответил по товару {spu_id}, используем копию из кэша: {e}")
+                return stale
             logger.error(f"Ошибка получения информации о товаре {spu_id}: {e}")
-            return {}
+            raise
@@ -1,18 +1,85 @@
 import asyncio
+import time
+from collections.abc import AsyncIterator
+from urllib.parse import urlparse
 
 import aiohttp
 from loguru import logger
 
+import utils
 from application.interfaces import WooCommerceClient
+from infrastracture.metrics import run_metrics
+from infrastracture.retry_policy import RetryPolicy, RetryableHTTPError, parse_retry_after
+
+SPU_ID_META_KEY = "_poizon_spu_id"
+SYNC_HASH_META_KEY = "_poizon_sync_hash"
+
+# Проекции полей (`_fields`) для чтения: запрашиваем только то, что реально используется
+PRODUCT_LOOKUP_FIELDS = ("id", "sku", "meta_data")
+CATALOG_INDEX_FIELDS = ("id", "brands", "meta_data")
+VARIATION_SYNC_FIELDS = ("id", "sku", "regular_price", "attributes",
+                         "stock_status", "manage_stock", "stock_quantity")
+PRICE_SYNC_FIELDS = ("id", "sku", "regular_price", "stock_status", "stock_quantity")
 
 
 class AsyncWooClient(WooCommerceClient):
     # TODO: create WooProduct
+    BATCH_LIMIT = 100
+
     def __init__(self, url: str, consumer_key: str, consumer_secret: str,
-                 session: aiohttp.ClientSession = None):
+                 session: aiohttp.ClientSession = None,
+                 retry_policy: RetryPolicy = None,
+                 page_concurrency: int = 4,
+                 variation_concurrency: int = 4):
         self.url = url.rstrip("/") + "/wp-json/wc/v3"
+        self.host = urlparse(self.url).netloc
         self.auth = aiohttp.BasicAuth(consumer_key, consumer_secret)
         self.session = session
+        self.retry_policy = retry_policy or RetryPolicy(retries=3)
+        # Сколько страниц коллекции запрашивать одновременно (см. paginate)
+        self.page_concurrency = page_concurrency
+        # Сколько batch-запросов вариаций отправлять одновременно при пакетной выгрузке
+        self.variation_concurrency = variation_concurrency
+        # Кэш справочных данных на время запуска (бренды, атрибуты, термины, категории)
+        self._reference_lock = asyncio.Lock()
+        self.invalidate_reference_cache()
+        # spu_id -> ID товара WooCommerce, заполняется сканированием каталога (get_spu_ids_by_brand_index)
+        self._product_ids_by_spu: dict[int, int] = {}
+
+    def invalidate_reference_cache(self):
+        self._brands: dict[str, dict] = {}
+        self._attributes: dict[str, dict] = {}
+        self._attribute_terms: dict[int, set[str]] = {}
+        self._category_ids: dict[str, int] = {}
+
+    async def warm_reference_cache(self, attribute_slugs: tuple[str] = ('pa_eu_size',)):
+        """
+        Загружает справочные данные одним проходом, чтобы не запрашивать их для каждого товара.
+        """
+        try:
+            await self._warm_reference_cache(attribute_slugs)
+        except Exception as e:
+            # Не критично: недостающие данные подгрузятся по ходу выгрузки
+            logger.warning(f"Не удалось загрузить справочные данные WooCommerce: {e}")
+            self.invalidate_reference_cache()
+
+    async def _warm_reference_cache(self, attribute_slugs: tuple[str]):
+        async with self._reference_lock:
+            async for brands in self.paginate("products/brands"):
+                for brand in brands:
+                    self._brands[brand["name"].lower()] = brand
+
+            status, attributes = await self._request("GET", "products/attributes")
+            for attr in attributes:
+                self._attributes[attr["slug"].lower()] = attr
+            for slug in attribute_slugs:
+                attr = self._attributes.get(slug.lower())
+                if attr:
+                    status, terms = await self.get_all_attribute_terms(attr["id"], per_page=100)
+                    self._attribute_terms[attr["id"]] = {t["name"].lower() for t in terms}
+        await self.get_sneakers_category_id()
+        logger.info(f"Справочные данные WooCommerce загружены: брендов {len(self._brands)}, "
+                    f"атрибутов {len(self._attributes)}")
 
     async def init_session(self):
         if self.session is None:
@@ -21,54 +88,121 @@ class AsyncWooClient(WooCommerceClient):
     async def close(self):
         await self.session.close()
 
-    async def _request(self, method: str, endpoint: str, params=None, json=None) -> tuple[int, dict | str]:
+    async def _request(self, method: str, endpoint: str, params=None, json=None,
+                       with_headers: bool = False) -> tuple[int, dict | str]:
+        """
+        :param with_headers: вернуть (status, data, headers) — например, для заголовков пагинации
+        """
         # TODO: rename to _safe_request
-        url = f"{self.url}/{endpoint}"
-        retries = 3
-        delay = 1.0
+        return await self.retry_policy.call(
+            self.host, self._request_once, method, endpoint, params=params, json=json,
+            with_headers=with_headers,
+            description=f"{method} {endpoint}",
+            on_retry=lambda: run_metrics.record_retry("woocommerce", method, endpoint),
+        )
 
-        for attempt in range(1, retries + 1):
-            try:
-                async with self.session.request(method, url, params=params, json=json) as resp:
-                    status = resp.status
-                    content_type = resp.headers.get("Content-Type", "")
-
-                    try:
-                        if "application/json" in content_type:
-                            data = await resp.json()
-                        else:
-                            data = await resp.text()
-                    except aiohttp.ContentTypeError:
+    async def _request_once(self, method: str, endpoint: str, params=None, json=None,
+                            with_headers: bool = False) -> tuple[int, dict | str]:
+        url = f"{self.url}/{endpoint}"
+        started = time.perf_counter()
+        try:
+            async with self.session.request(method, url, params=params, json=json) as resp:
+                status = resp.status
+                content_type = resp.headers.get("Content-Type", "")
+                # Тело читается один раз и кэшируется aiohttp для json()/text()
+                body = await resp.read()
+                run_metrics.record_request("woocommerce", method, endpoint, status=status,
+                                           latency=time.perf_counter() - started, size=len(body))
+
+                try:
+                    if "application/json" in content_type:
+                        data = await resp.json()
+                    else:
                         data = await resp.text()
+                except aiohttp.ContentTypeError:
+                    data = await resp.text()
+
+                # Успешный ответ
+                if 200 <= status < 300:
+                    return (status, data, resp.headers) if with_headers else (status, data)
+
+                # Ошибки
+                data = str(data)
+                logger.warning(f"Ошибка API {status} {method} {url}")
+                logger.debug(f"Ответ: {data[:400]}")
+
+                if self.retry_policy.is_retryable_status(status):
+                    raise RetryableHTTPError(status, data[:400],
+                                             retry_after=parse_retry_after(resp.headers.get("Retry-After")))
+                raise Exception(f"API вернул {status}: {data[:400]}")
+        except aiohttp.ClientError as e:
+            run_metrics.record_request("woocommerce", method, endpoint, status="error",
+                                       latency=time.perf_counter() - started)
+            logger.error(f"Ошибка соединения {method} {url}: {e}")
+            raise
+
+    async def paginate(self, endpoint: str, params: dict = None, *,
+                       per_page: int = 100, concurrency: int = None) -> AsyncIterator[list[dict]]:
+        """
+        Постранично читает коллекцию WooCommerce и отдаёт страницы по порядку.
 
-                    # Успешный ответ
-                    if 200 <= status < 300:
-                        return status, data
-
-                    # Ошибки
-                    data = str(data)
-                    logger.warning(f"[Попытка {attempt}/{retries}] Ошибка API {status} {method} {url}")
-                    logger.debug(f"Ответ: {data[:400]}")
-
-                    # Не повторяем для 404 и 401
-                    if status in [401, 404]:
-                        raise Exception(f"API вернул {status}: {data[:400]}")
-
-                    # Backoff для ошибок сервера
-                    await asyncio.sleep(delay * (2 ** (attempt - 1)))
-
-            except aiohttp.ClientError as e:
-                logger.error(f"[Попытка {attempt}/{retries}] Ошибка соединения: {e}")
-                await asyncio.sleep(delay * (2 ** (attempt - 1)))
-
-        raise Exception(f"API не ответил после {retries} попыток: {method} {url}")
-
-    async def get_product_by_sku(self, sku: str):
-        status, products = await self._request("GET", "products", params={"sku": sku})
+        Первая страница сообщает число страниц (X-WP-TotalPages), остальные запрашиваются
+        параллельно (не более `concurrency` одновременно). Без заголовка — последовательно
+        до пустой или неполной страницы.
+        """
+        params = {**(params or {}), "per_page": per_page}
+        status, data, headers = await self._request("GET", endpoint, params={**params, "page": 1},
+                                                    with_headers=True)
+        if not data:
+            return
+        yield data
+
+        total_pages = headers.get("X-WP-TotalPages")
+        if total_pages is None:
+            page = 1
+            while len(data) >= per_page:
+                page += 1
+                status, data = await self._request("GET", endpoint, params={**params, "page": page})
+                if not data:
+                    return
+                yield data
+            return
+
+        semaphore = asyncio.Semaphore(concurrency or self.page_concurrency)
+
+        async def fetch(page: int) -> list[dict]:
+            async with semaphore:
+                _, page_data = await self._request("GET", endpoint, params={**params, "page": page})
+                return page_data
+
+        tasks = [asyncio.create_task(fetch(page)) for page in range(2, int(total_pages) + 1)]
+        try:
+            for task in tasks:
+                page_data = await task
+                if page_data:
+                    yield page_data
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    @staticmethod
+    def _read_params(params: dict, fields: tuple[str] = None, **filters) -> dict:
+        """
+        Добавляет к параметрам запроса проекцию полей (`_fields`) и непустые серверные фильтры.
+        """
+        params = dict(params)
+        if fields:
+            params["_fields"] = ",".join(fields)
+        params.update({key: value for key, value in filters.items() if value is not None})
+        return params
+
+    async def get_product_by_sku(self, sku: str, fields: tuple[str] = None):
+        status, products = await self._request("GET", "products",
+                                               params=self._read_params({"sku": sku}, fields))
         return products[0] if status == 200 and products else None
 
     async def create_or_update_product(self, data: dict):
-        existing = await self.get_product_by_sku(data.get("sku"))
+        existing = await self.get_product_by_sku(data.get("sku"), fields=("id",))
         if existing:
             product_id = existing["id"]
             return await self._request("PUT", f"products/{product_id}", json=data)
@@ -78,33 +212,85 @@ class AsyncWooClient(WooCommerceClient):
         """
         Проверяет наличие бренда. Если нет — создает и возвращает ID.
         """
-        # Проверяем по имени
-        status, brands = await self._request(
-            "GET",
-            "products/brands",
-            params={"search": brand_name}
-        )
-
-        if brands:
-            return brands[0]
+        async with self._reference_lock:
+            cached = self._brands.get(brand_name.lower())
+            if cached:
+                return cached
 
-        # Если нет — создаем
-        status, brand = await self._request(
-            "POST",
-            "products/brands",
-            json={"name": brand_name, "slug": brand_name.lower().replace(" ", "-")}
-        )
+            # Проверяем по имени
+            status, brands = await self._request(
+                "GET",
+                "products/brands",
+                params={"search": brand_name}
+            )
 
-        return brand
+            if brands:
+                brand = brands[0]
+            else:
+                # Если нет — создаем
+                status, brand = await self._request(
+                    "POST",
+                    "products/brands",
+                    json={"name": brand_name, "slug": brand_name.lower().replace(" ", "-")}
+                )
+            self._brands[brand_name.lower()] = brand
+            return brand
 
     async def create_or_update_variable_product_with_variations(self, base_data: dict,
                                                                 variations: list[dict]) -> (int, dict):
+        try:
+            return await self._create_or_update_variable_product_with_variations(base_data, variations)
+        except Exception:
+            # Справочник мог разойтись с магазином (например, бренд или термин удалили) — перечитаем
+            self.invalidate_reference_cache()
+            raise
+
+    async def _create_or_update_variable_product_with_variations(self, base_data: dict,
+                                                                 variations: list[dict]) -> (int, dict):
+        # Хэш считаем до любых изменений variations
+        sync_hash = self.sync_hash(base_data, variations)
+        existing = await self.get_product_by_sku(base_data.get('sku'), fields=PRODUCT_LOOKUP_FIELDS)
+        if existing and self.get_meta_value(existing, SYNC_HASH_META_KEY) == sync_hash:
+            # Товар не изменился, но цены в хэш не входят: вариации сверяем всегда
+            # (один GET и ни одной записи, если цены тоже совпадают)
+            logger.info(f"Товар `{base_data.get('name')}` не изменился с прошлой выгрузки, сверяем только вариации...")
+            status, response = await self.sync_product_variations(existing["id"], variations)
+            if status != 200:
+                return status, response
+            return 200, {"id": existing["id"], "message": "Product unchanged, skipped", "skipped": True}
+
+        product_data, final_data = await self._build_product_payloads(base_data, variations, existing, sync_hash)
+
+        if existing:
+            # Для существующего товара вариации синхронизируем до сохранения,
+            # тогда все поля товара записываются одним PUT
+            logger.info(f"Товар  `{product_data.get('name')}` существует, обновляем...")
+            product_id = existing["id"]
+            await self.sync_product_variations(product_id, variations)
+            await self._request("PUT", f"products/{product_id}", json={**product_data, **final_data})
+            status_code = 200
+        else:
+            status, product = await self._request("POST", "products", json=product_data)
+            if status != 201:
+                return status, product
+            product_id = product["id"]
+            status_code = 201
+
+            await self.add_product_variations(product_id, variations)
+            await self._request("PUT", f"products/{product_id}", json=final_data)
+
+        return status_code, {"id": product_id, "message": "Product created or updated with variations"}
+
+    async def _build_product_payloads(self, base_data: dict, variations: list[dict],
+                                      existing: dict | None, sync_hash: str) -> tuple[dict, dict]:
+        """
+        Возвращает (данные товара, данные финального сохранения после записи вариаций).
+        """
         # Получаем ID бренда
         brand_name = base_data.get("brand")
         brand = None
         if brand_name:
             brand = await self.ensure_brand_exists(brand_name)
-        existing = await self.get_product_by_sku(base_data.get('sku'))
         options: list[str] = [v["attributes"][0]["option"] for v in variations]
         attr = await self.ensure_attribute_and_terms('pa_eu_size', tuple(options))
 
@@ -125,7 +311,7 @@ class AsyncWooClient(WooCommerceClient):
             "manage_stock": False,
             "meta_data": [
                 {
-                    "key": "_poizon_spu_id",
+                    "key": SPU_ID_META_KEY,
                     "value": str(base_data.get('spu_id'))
                 }],
             "categories": [
@@ -141,39 +327,165 @@ class AsyncWooClient(WooCommerceClient):
         if not existing:
             product_data["images"] = base_data.get("images", [])
 
-        if existing:
-            logger.info(f"Товар  `{product_data.get('name')}` существует, обновляем...")
-            product_id = existing["id"]
-            await self._request("PUT", f"products/{product_id}", json=product_data)
-
-            await self.delete_all_existing_variations(product_id)
-
-            status_code = 200
-        else:
-            status, product = await self._request("POST", "products", json=product_data)
-            if status != 201:
-                return status, product
-            product_id = product["id"]
-            status_code = 201
-
-        await self.add_product_variations(product_id, variations)
-
-        # Принудительно повторно сохраняем атрибуты, чтобы WooCommerce инициализировал вариации
-        await self._request("PUT", f"products/{product_id}", json={"attributes": [attr]})
-
-        await self._request("PUT", f"products/{product_id}", json={
+        # Финальное сохранение товара: атрибуты + вариант по умолчанию + хэш.
+        # Сохранение после записи вариаций нужно, чтобы WooCommerce инициализировал вариации
+        # (синхронизировал цены и атрибуты вариативного товара). Хэш пишем здесь же,
+        # чтобы прерванная выгрузка не считалась завершённой.
+        final_data = {
             "attributes": [attr],
+            "meta_data": product_data["meta_data"] + [{"key": SYNC_HASH_META_KEY, "value": sync_hash}],
             "default_attributes": [
                 {
                     "name": "pa_eu_size",
                     "option": attr["options"][0]  # первая доступная
                 }
             ]
-        })
-        return status_code, {"id": product_id, "message": "Product created or updated with variations"}
+        }
+
+        return product_data, final_data
+
+    async def bulk_create_or_update_variable_products(self, items: list[tuple[dict, list[dict]]]
+                                                      ) -> list[tuple[int, dict]]:
+        """
+        Пакетная выгрузка вариативных товаров: товары создаются и сохраняются через `products/batch`
+        (до 100 в запросе), вариации — отдельным batch-запросом на товар (не более `variation_concurrency`
+        одновременно). Товар, вариации которого не добавились, получает ошибку и финально не сохраняется.
+
+        :param items: список пар (base_data, variations) из `SPUMapper.from_domain_to_woocomerce`
+        :return: (status, result) для каждого элемента в порядке `items`
+        """
+        try:
+            return await self._bulk_create_or_update_variable_products(items)
+        except Exception:
+            self.invalidate_reference_cache()
+            raise
+
+    async def _bulk_create_or_update_variable_products(self, items: list[tuple[dict, list[dict]]]
+                                                       ) -> list[tuple[int, dict]]:
+        results: list[tuple[int, dict] | None] = [None] * len(items)
+        existing_by_sku = await self.get_products_by_skus([base.get('sku') for base, _ in items],
+                                                          fields=PRODUCT_LOOKUP_FIELDS)
+        creates: list[tuple[int, dict, dict]] = []
+        final_updates: list[tuple[int, dict]] = []
+        for index, (base_data, variations) in enumerate(items):
+            # Хэш считаем до любых изменений variations
+            sync_hash = self.sync_hash(base_data, variations)
+            existing = existing_by_sku.get(base_data.get('sku'))
+            try:
+                if existing and self.get_meta_value(existing, SYNC_HASH_META_KEY) == sync_hash:
+                    logger.info(f"Товар `{base_data.get('name')}` не изменился с прошлой выгрузки, "
+                                f"сверяем только вариации...")
+                    status, response = await self.sync_product_variations(existing["id"], variations)
+                    results[index] = (200, {"id": existing["id"], "message": "Product unchanged, skipped",
+                                            "skipped": True}) if status == 200 else (status, response)
+                    continue
+                product_data, final_data = await self._build_product_payloads(base_data, variations,
+                                                                              existing, sync_hash)
+                if existing:
+                    await self.sync_product_variations(existing["id"], variations)
+                    final_updates.append((index, {"id": existing["id"], **product_data, **final_data}))
+                else:
+                    creates.append((index, product_data, final_data))
+            except Exception as e:
+                results[index] = (500, {"message": str(e)})
+
+        # 1. Создаём новые товары и добавляем им вариации
+        created = await self._products_batch("create", [data for _, data, _ in creates])
+        created_indexes = set()
+        new_products = []
+        for (index, _, final_data), item in zip(creates, created):
+            if item.get("error") or not item.get("id"):
+                results[index] = (400, item.get("error", item))
+                continue
+            new_products.append((index, item["id"], final_data))
+        semaphore = asyncio.Semaphore(max(1, self.variation_concurrency))
+
+        async def add_variations(index: int, product_id: int) -> bool:
+            # Ошибка вариаций одного товара не должна прерывать выгрузку остальных
+            async with semaphore:
+                try:
+                    status, response = await self.add_product_variations(product_id, items[index][1])
+                except Exception as e:
+                    status, response = 500, str(e)
+            if status != 200:
+                results[index] = (status, {"id": product_id, "message": f"Не удалось добавить вариации: {response}"})
+                return False
+            return True
+
+        added = await asyncio.gather(*(add_variations(index, product_id) for index, product_id, _ in new_products))
+        for (index, product_id, final_data), ok in zip(new_products, added):
+            if ok:
+                created_indexes.add(index)
+                final_updates.append((index, {"id": product_id, **final_data}))
+
+        # 2. Финальное сохранение всех товаров (инициализация вариаций + хэш)
+        saved = await self._products_batch("update", [data for _, data in final_updates])
+        for (index, data), item in zip(final_updates, saved):
+            if item.get("error"):
+                results[index] = (400, item["error"])
+            else:
+                results[index] = (201 if index in created_indexes else 200,
+                                  {"id": data["id"], "message": "Product created or updated with variations"})
+        return [result if result is not None else (500, {"message": "missing in batch response"})
+                for result in results]
+
+    async def _products_batch(self, action: str, items: list[dict]) -> list[dict]:
+        """
+        Отправляет `create`/`update` в `products/batch` порциями по BATCH_LIMIT.
+        Возвращает ответы по каждому элементу в исходном порядке (с ключом `error` при ошибке).
+        """
+        responses = []
+        for start in range(0, len(items), self.BATCH_LIMIT):
+            chunk = items[start:start + self.BATCH_LIMIT]
+            try:
+                status, response = await self._request("POST", "products/batch", json={action: chunk})
+            except Exception as e:
+                status, response = None, str(e)
+            if status == 200 and isinstance(response, dict):
+                chunk_responses = response.get(action, [])[:len(chunk)]
+                if len(chunk_responses) < len(chunk):
+                    # Недостающие ответы помечаем ошибкой, чтобы следующие порции не сдвинулись
+                    logger.warning(f"products/batch ({action}) вернул {len(chunk_responses)} "
+                                   f"ответов на {len(chunk)} товаров")
+                    chunk_responses += [{"error": {"message": "missing in batch response"}}
+                                        for _ in range(len(chunk) - len(chunk_responses))]
+                responses.extend(chunk_responses)
+            else:
+                logger.warning(f"Не удалось выполнить products/batch ({action}): status={status}, response={response}")
+                responses.extend({"error": {"message": str(response)}} for _ in chunk)
+        return responses
+
+    async def get_products_by_skus(self, skus: list[str], fields: tuple[str] = None) -> dict[str, dict]:
+        """
+        Ищет товары по списку SKU (по 100 SKU в запросе). Возвращает SKU -> товар.
+        """
+        if fields and "sku" not in fields:
+            fields = (*fields, "sku")
+        skus = [sku for sku in dict.fromkeys(skus) if sku]
+        products = {}
+        for start in range(0, len(skus), 100):
+            chunk = skus[start:start + 100]
+            status, data = await self.list_products(1, per_page=100, fields=fields, sku=",".join(chunk))
+            for product in data or []:
+                products[product["sku"]] = product
+        return products
+
+    @staticmethod
+    def sync_hash(base_data: dict, variations: list[dict]) -> str:
+        """
+        Хэш полной выгрузки (`SYNC_HASH_META_KEY`) по всем данным, кроме цен вариаций.
+        Цены сверяются с магазином при каждой выгрузке, поэтому обновление только цен
+        (`update_product_prices`) хэш не меняет и товар заново не сохраняет.
+        """
+        return utils.content_hash(base_data, [{key: value for key, value in variation.items() if key != "regular_price"}
+                                              for variation in variations])
+
+    @staticmethod
+    def get_meta_value(product: dict, key: str):
+        return next((meta.get("value") for meta in product.get("meta_data", []) if meta.get("key") == key), None)
 
     async def delete_all_existing_variations(self, product_id: int | str) -> tuple[int, dict]:
-        existing_vars = await self.get_all_variations(product_id)
+        existing_vars = await self.get_all_variations(product_id, fields=("id",))
         if not existing_vars:
             return 200, {"message": "Нет вариаций для удаления"}
 
@@ -191,52 +503,125 @@ class AsyncWooClient(WooCommerceClient):
             logger.warning(f"Не удалось удалить вариации: status={status}, response={response}")
         return status, response
 
-    async def add_product_variations(self, product_id: int, variations: list[dict]) -> tuple[int, dict]:
+    @staticmethod
+    def _set_variation_defaults(variations: list[dict]):
         # Установим stock_status по умолчанию
         for variation in variations:
             variation.setdefault("manage_stock", True)
             variation.setdefault("stock_status", "instock")
             variation.setdefault("stock_quantity", 1)
 
-        payload = {
-            "create": variations
-        }
+    @staticmethod
+    def _variation_changes(current: dict, desired: dict) -> dict:
+        """
+        Возвращает поля desired, которые отличаются от текущей вариации.
+        Атрибуты сравниваются по значениям опций (имена у WooCommerce и у нас не совпадают).
+        """
+        changes = {}
+        for key, value in desired.items():
+            if key == "attributes":
+                current_options = sorted(str(a.get("option")) for a in current.get("attributes", []))
+                desired_options = sorted(str(a.get("option")) for a in value)
+                if current_options != desired_options:
+                    changes[key] = value
+            elif key != "sku" and str(current.get(key)) != str(value):
+                changes[key] = value
+        return changes
+
+    async def sync_product_variations(self, product_id: int | str, variations: list[dict]) -> tuple[int, dict]:
+        """
+        Приводит вариации товара к `variations` минимальным набором изменений.
+        Вариации сопоставляются по SKU (`{article_code}-{sku_code}`): изменённые обновляются,
+        новые создаются, лишние (и вариации без SKU) удаляются — одним batch-запросом.
+        """
+        self._set_variation_defaults(variations)
+        existing_vars = await self.get_all_variations(product_id, fields=VARIATION_SYNC_FIELDS)
+        existing_by_sku = {}
+        # Вариации без SKU и дубли по SKU удаляем
+        stale_ids = []
+        for var in existing_vars:
+            if not var.get("sku") or var["sku"] in existing_by_sku:
+                stale_ids.append(var["id"])
+            else:
+                existing_by_sku[var["sku"]] = var
+
+        payload = {"create": [], "update": [], "delete": []}
+        for variation in variations:
+            current = existing_by_sku.pop(variation["sku"], None)
+            if current is None:
+                payload["create"].append(variation)
+                continue
+            changes = self._variation_changes(current, variation)
+            if changes:
+                payload["update"].append({"id": current["id"], **changes})
+        payload["delete"] = stale_ids + [var["id"] for var in existing_by_sku.values()]
+        payload = {action: items for action, items in payload.items() if items}
+
+        if not payload:
+            return 200, {"message": "Вариации не изменились"}
+        logger.debug(f"Синхронизация вариаций товара {product_id}: "
+                     + ", ".join(f"{action}={len(items)}" for action, items in payload.items()))
+        return await self._variations_batch(product_id, payload)
+
+    async def _variations_batch(self, product_id: int | str, payload: dict) -> tuple[int, dict]:
+        # WooCommerce принимает не более 100 объектов в одном batch-запросе
+        items = [(action, item) for action, action_items in payload.items() for item in action_items]
+        status, response = 200, {}
+        for start in range(0, len(items), self.BATCH_LIMIT):
+            chunk: dict[str, list] = {}
+            for action, item in items[start:start + self.BATCH_LIMIT]:
+                chunk.setdefault(action, []).append(item)
+            status, response = await self._request(
+                "POST",
+                f"products/{product_id}/variations/batch",
+                json=chunk
+            )
+            if status != 200:
+                logger.warning(f"Не удалось синхронизировать вариации: status={status}, response={response}")
+                break
+        return status, response
 
-        status, response = await self._request(
-            "POST",
-            f"products/{product_id}/variations/batch",
-            json=payload
-        )
+    async def add_product_variations(self, product_id: int, variations: list[dict]) -> tuple[int, dict]:
+        self._set_variation_defaults(variations)
+        # _variations_batch делит вариации на запросы по BATCH_LIMIT
+        status, response = await self._variations_batch(product_id, {"create": variations})
 
         if status != 200:
             logger.warning(f"Не удалось добавить вариации: status={status}, response={response}")
         return status, response
 
-    # @alru_cache(maxsize=128)
     async def ensure_attribute_and_terms(self, attribute_slug: str, terms: tuple[str]) -> dict:
-        # Получить список глобальных атрибутов
-        status, attributes = await self._request("GET", "products/attributes")
-        attr: dict = next((a for a in attributes if a["slug"].lower() == attribute_slug.lower()), None)
-
-        # Если атрибут не существует — создаем
-        if not attr:
-            status, attr = await self._request("POST", f"products/attributes", json={
-                "name": attribute_slug,
-                "type": "select",
-                "has_archives": True
-            })
-
-        attr_id: int = attr["id"]
-        # Получить текущие термины
-        status, existing_terms = await self.get_all_attribute_terms(attr_id, per_page=100)
-        existing_names = {t["name"].lower() for t in existing_terms}
-
-        # Добавить отсутствующие термины
-        for term in terms:
-            if term.lower() not in existing_names:
-                await self._request("POST", f"products/attributes/{attr_id}/terms", json={"name": term})
-
-        return attr
+        async with self._reference_lock:
+            attr: dict = self._attributes.get(attribute_slug.lower())
+            if not attr:
+                # Получить список глобальных атрибутов
+                status, attributes = await self._request("GET", "products/attributes")
+                attr = next((a for a in attributes if a["slug"].lower() == attribute_slug.lower()), None)
+
+            # Если атрибут не существует — создаем
+            if not attr:
+                status, attr = await self._request("POST", f"products/attributes", json={
+                    "name": attribute_slug,
+                    "type": "select",
+                    "has_archives": True
+                })
+            self._attributes[attribute_slug.lower()] = attr
+
+            attr_id: int = attr["id"]
+            existing_names = self._attribute_terms.get(attr_id)
+            if existing_names is None:
+                # Получить текущие термины
+                status, existing_terms = await self.get_all_attribute_terms(attr_id, per_page=100)
+                existing_names = {t["name"].lower() for t in existing_terms}
+                self._attribute_terms[attr_id] = existing_names
+
+            # Добавить отсутствующие термины
+            for term in terms:
+                if term.lower() not in existing_names:
+                    await self._request("POST", f"products/attributes/{attr_id}/terms", json={"name": term})
+                    existing_names.add(term.lower())
+
+            return attr
 
     async def get_all_attribute_terms(self, attr_id: int, per_page: int = 100) -> (int, list[dict]):
         """
@@ -247,29 +632,9 @@ class AsyncWooClient(WooCommerceClient):
         :return: Список терминов (list[dict])
         """
         all_terms = []
-        page = 1
-
-        while True:
-            status, terms_page = await self._request(
-                "GET",
-                f"products/attributes/{attr_id}/terms",
-                params={"per_page": per_page, "page": page}
-            )
-
-            if status != 200:
-                logger.error(f"Ошибка получения терминов для атрибута {attr_id}: {status}, {terms_page}")
-                break
-
-            if not terms_page:  # Пустой ответ → конец
-                break
-
+        async for terms_page in self.paginate(f"products/attributes/{attr_id}/terms", per_page=per_page):
             all_terms.extend(terms_page)
-
-            if len(terms_page) < per_page:
-                break  # Последняя страница
-
-            page += 1
-
+        status = 200
         return status, all_terms
 
     async def get_sneakers_category_id(self):
@@ -278,22 +643,22 @@ class AsyncWooClient(WooCommerceClient):
             "slug": "sneakers",
             "parent": 0  # 0 = корневая категория
         }
-        resp = await self._request("GET", "products/categories", params={"slug": category_data["slug"]})
-        if not resp[1]:  # не нашли
-            _, new_cat = await self._request("POST", "products/categories", json=category_data)
-            category_id = new_cat["id"]
-        else:
-            category_id = resp[1][0]["id"]
-        return category_id
+        async with self._reference_lock:
+            category_id = self._category_ids.get(category_data["slug"])
+            if category_id is not None:
+                return category_id
+            resp = await self._request("GET", "products/categories", params={"slug": category_data["slug"]})
+            if not resp[1]:  # не нашли
+                _, new_cat = await self._request("POST", "products/categories", json=category_data)
+                category_id = new_cat["id"]
+            else:
+                category_id = resp[1][0]["id"]
+            self._category_ids[category_data["slug"]] = category_id
+            return category_id
 
     async def get_all_spu_ids_by_brand(self, brand: str) -> list[int]:
         spu_ids = []
-        page = 1
-
-        while True:
-            status, products = await self._request("GET", "products", params={"per_page": 100, "page": page})
-            if not products:
-                break
+        async for products in self.iter_products(fields=("meta_data", "attributes")):
             for product in products:
                 spu_id = None
                 is_brand_match = False
@@ -311,8 +676,7 @@ class AsyncWooClient(WooCommerceClient):
                             break
 
                 if spu_id and is_brand_match:
-                    spu_ids.append(meta["value"])
-            page += 1
+                    spu_ids.append(spu_id)
 
         return spu_ids
 
@@ -324,43 +688,116 @@ class AsyncWooClient(WooCommerceClient):
 
         return product if status == 200 and product else None
 
-    async def list_products(self, page: int = 1, per_page: int = 10) -> (int, list[dict]):
-        return await self._request("GET", "products", params={"page": page, "per_page": per_page})
+    async def list_products(self, page: int = 1, per_page: int = 10, *,
+                            fields: tuple[str] = None,
+                            brand_id: int = None,
+                            sku: str = None,
+                            modified_after: str = None) -> (int, list[dict]):
+        """
+        :param fields: проекция полей ответа (`_fields`)
+        :param brand_id: серверный фильтр по таксономии брендов
+        :param sku: серверный фильтр по SKU
+        :param modified_after: серверный фильтр по дате изменения (ISO 8601)
+        """
+        params = self._read_params({"page": page, "per_page": per_page}, fields,
+                                   brand=brand_id, sku=sku, modified_after=modified_after)
+        return await self._request("GET", "products", params=params)
+
+    def iter_products(self, *,
+                      fields: tuple[str] = None,
+                      brand_id: int = None,
+                      sku: str = None,
+                      modified_after: str = None) -> AsyncIterator[list[dict]]:
+        """
+        Все страницы каталога (по 100 товаров) через `paginate`; фильтры — как у `list_products`.
+        """
+        params = self._read_params({}, fields, brand=brand_id, sku=sku, modified_after=modified_after)
+        return self.paginate("products", params)
 
-    async def get_all_products_by_brand(self, brand: str) -> list[dict]:
+    async def get_all_products_by_brand(self, brand: str, fields: tuple[str] = None,
+                                        modified_after: str = None) -> list[dict]:
         """
         Возвращает все товары из WooCommerce, у которых бренд совпадает с brand.
+        Если ID бренда уже известен, фильтрация выполняется на стороне WooCommerce.
         """
+        if fields and "brands" not in fields:
+            fields = (*fields, "brands")
+        known_brand = self._brands.get(brand.lower())
+        brand_id = known_brand.get("id") if known_brand else None
         products = []
-        page = 1
-        while True:
-            status, data = await self.list_products(page,
-                                                    per_page=100
-                                                    )
-            if not data:
-                break
-            filtered_data = [prod for prod in data if prod.get('brands', [{}])[0].get('name').lower() == brand.lower()]
+        async for data in self.iter_products(fields=fields, brand_id=brand_id, modified_after=modified_after):
+            filtered_data = [prod for prod in data
+                             if (prod.get('brands') or [{}])[0].get('name', '').lower() == brand.lower()]
             products.extend(filtered_data)
-            if len(data) < 100:
-                break
-            page += 1
         return products
 
-    async def get_all_variations(self, product_id: int) -> list[dict]:
-        variations = []
-        page = 1
+    async def get_spu_ids_by_brand_index(self) -> dict[str, list[int]]:
+        """
+        Один проход по всему каталогу WooCommerce: бренд (в нижнем регистре) -> список `_poizon_spu_id`.
+        """
+        index: dict[str, list[int]] = {}
+        total = 0
+        async for data in self.iter_products(fields=CATALOG_INDEX_FIELDS):
+            total += len(data)
+            for product in data:
+                brand = (product.get('brands') or [{}])[0].get('name')
+                spu_id = self.get_meta_value(product, SPU_ID_META_KEY)
+                if not brand or not spu_id:
+                    continue
+                try:
+                    index.setdefault(brand.lower(), []).append(int(spu_id))
+                    self._product_ids_by_spu[int(spu_id)] = product['id']
+                except ValueError:
+                    logger.warning(f"Некорректный {SPU_ID_META_KEY}={spu_id!r} у товара {product.get('id')}")
+        logger.info(f"Каталог WooCommerce просканирован: {total} товаров, брендов {len(index)}")
+        return index
+
+    async def update_product_prices(self, base_data: dict, variations: list[dict]) -> tuple[int, dict] | None:
+        """
+        Быстрое обновление уже выгруженного товара: меняются только `regular_price` и наличие вариаций,
+        одним `variations/batch` `update` по SKU. Товар, бренд, атрибуты и изображения не трогаются.
+        SKU, пропавшие у Poizon, помечаются отсутствующими, а не удаляются.
+        Цены не входят в хэш полной выгрузки (см. `sync_hash`), поэтому товар не сохраняется.
 
-        while True:
-            status, page_data = await self._request(
-                "GET",
-                f"products/{product_id}/variations",
-                params={"per_page": 100, "page": page}  # максимум 100
-            )
-            if not page_data:
-                break
-            variations.extend(page_data)
-            if len(page_data) < 100:
-                break
-            page += 1
+        :return: (status, {"id": product_id, ...}) или None, если нужна полная синхронизация
+            (товара нет в WooCommerce или появились новые SKU)
+        """
+        product_id = self._product_ids_by_spu.get(base_data.get('spu_id'))
+        if product_id is None:
+            existing = await self.get_product_by_sku(base_data.get('sku'), fields=("id",))
+            if not existing:
+                return None
+            product_id = existing['id']
+
+        existing_by_sku = {var["sku"]: var
+                           for var in await self.get_all_variations(product_id, fields=PRICE_SYNC_FIELDS)
+                           if var.get("sku")}
+        desired_by_sku = {variation["sku"]: variation for variation in variations}
+        if not desired_by_sku.keys() <= existing_by_sku.keys():
+            return None
+
+        updates = []
+        for sku, current in existing_by_sku.items():
+            variation = desired_by_sku.get(sku)
+            if variation is None:
+                desired = {"stock_status": "outofstock", "stock_quantity": 0}
+            else:
+                desired = {"regular_price": variation["regular_price"],
+                           "stock_status": "instock", "stock_quantity": 1}
+            changes = {key: value for key, value in desired.items() if str(current.get(key)) != str(value)}
+            if changes:
+                updates.append({"id": current["id"], **changes})
+
+        if not updates:
+            return 200, {"id": product_id, "message": "Цены не изменились"}
+        logger.debug(f"Обновление цен товара {product_id}: вариаций {len(updates)}")
+        status, response = await self._variations_batch(product_id, {"update": updates})
+        if status != 200:
+            return status, response
+        return status, {"id": product_id, "updated": len(updates)}
 
+    async def get_all_variations(self, product_id: int, fields: tuple[str] = None) -> list[dict]:
+        variations = []
+        async for page_data in self.paginate(f"products/{product_id}/variations", self._read_params({}, fields)):
+            variations.extend(page_data)
         return variations
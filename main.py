@@ -1,15 +1,22 @@
+import argparse
 import asyncio
 import os
+import time
 from pathlib import Path
 
 import yaml
 from dotenv import load_dotenv
 from loguru import logger
 
-from application.use_cases.collect_spu_from_poizon import collect_spu_from_poizon
-from application.use_cases.collect_spus_from_last_top import collect_spus_from_last_top
-from application.use_cases.upload_spu_to_woocommerce import upload_all_spus_to_woocommerce
+from application.services import SPURegistry
+from application.use_cases.sync_brand_pipeline import sync_brand_pipeline
+from application.use_cases.upload_spu_to_woocommerce import UploadResult
 from infrastracture.mappers import SPUMapper
+from infrastracture.metrics import run_metrics
+from infrastracture.product_cache import ProductInfoCache
+from infrastracture.rate_limiter import AdaptiveRateLimiter
+from infrastracture.retry_policy import RetryPolicy
+from infrastracture.run_journal import RunJournal
 from infrastracture.thepoizon_client import ThePoizonClient
 from infrastracture.woo_client import AsyncWooClient
 
@@ -48,35 +55,135 @@ brands = {
 POIZON_API_KEY = os.getenv("POIZON_API_KEY")
 
 
-async def main():
-    logger.info(f"Запуск...Количество товаров на каждый бренд: {MAX_PRODUCTS_PER_BRAND}. ")
+async def sync_brand(*, brand_name: str, brand_ids: list[int], pz_client, woo_client,
+                     catalog_index: dict[str, list[int]] = None,
+                     registry: SPURegistry = None,
+                     journal: RunJournal = None) -> tuple[float, list[UploadResult]]:
+    """
+    Полный цикл по одному бренду: сбор топа, сбор товаров из прошлого топа, выгрузка.
+
+    :return: время обработки бренда в секундах и результаты выгрузки по каждому SPU
+    """
+    started = time.perf_counter()
+    results = await sync_brand_pipeline(brand_name=brand_name,
+                              brand_ids=brand_ids,
+                              max_pages=MAX_PAGES,
+                              max_products=MAX_PRODUCTS_PER_BRAND,
+                              pz_client=pz_client,
+                              woo_client=woo_client,
+                              mapper=SPUMapper,
+                              config=config,
+                              catalog_index=catalog_index,
+                              registry=registry,
+                              journal=journal)
+    return time.perf_counter() - started, results
+
+
+async def sync_all_brands(*, pz_client, woo_client, concurrency: int,
+                          brands: dict[str, list[int]] = brands,
+                          journal: RunJournal = None) -> dict[str, float | None]:
+    """
+    Обрабатывает бренды параллельно, но не более `concurrency` одновременно.
+    Ошибка одного бренда не останавливает остальные.
+    Бренды и SPU, уже обработанные по журналу `journal`, пропускаются.
+
+    :return: словарь бренд -> время обработки в секундах (None, если бренд упал с ошибкой)
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    # Каталог WooCommerce сканируем один раз для всех брендов
+    catalog_index = await woo_client.get_spu_ids_by_brand_index()
+    # Один SPU может встретиться у нескольких брендов (например, Adidas и Yeezy)
+    registry = SPURegistry(completed=journal.uploaded_spu_ids() if journal else None)
+    finished_brands = journal.finished_brands() if journal else set()
+    if finished_brands or registry.completed:
+        logger.info(f'Продолжение запуска: пропускаем брендов — {len(finished_brands)}, '
+                    f'уже выгруженных товаров — {len(registry.completed)}')
+    timings: dict[str, float | None] = {}
+
+    async def run(brand_name: str, brand_ids: list[int]):
+        async with semaphore:
+            try:
+                elapsed, results = await sync_brand(brand_name=brand_name,
+                                           brand_ids=brand_ids,
+                                           pz_client=pz_client,
+                                           woo_client=woo_client,
+                                           catalog_index=catalog_index,
+                                           registry=registry,
+                                           journal=journal)
+            except Exception as e:
+                logger.error(f'Бренд `{brand_name}` не обработан: {e}')
+                logger.exception(e)
+                timings[brand_name] = None
+                return
+            timings[brand_name] = elapsed
+            failed = sum(not result.ok for result in results)
+            if failed:
+                # Бренд не отмечается завершённым: при --resume невыгруженные SPU будут повторены
+                logger.warning(f'Бренд `{brand_name}` обработан за {elapsed:.1f} сек., '
+                               f'не выгружено товаров: {failed}')
+                return
+            if journal:
+                journal.mark_brand_finished(brand_name)
+            logger.info(f'Бренд `{brand_name}` обработан за {elapsed:.1f} сек.')
+
+    await asyncio.gather(*(run(brand_name, brand_ids) for brand_name, brand_ids in brands.items()
+                           if brand_name not in finished_brands))
+    registry.report()
+    return timings
+
+
+async def main(resume: bool = False):
+    brands_concurrency = config.get('sync', {}).get('brands_concurrency', 1)
+    logger.info(f"Запуск...Количество товаров на каждый бренд: {MAX_PRODUCTS_PER_BRAND}. "
+                f"Брендов одновременно: {brands_concurrency}.")
+    # Одна политика повторов на оба клиента; circuit breaker у каждого хоста свой
+    retry_policy = RetryPolicy(**config.get('retry', {}))
     woo_client = AsyncWooClient(
         url=os.getenv('WC_URL'),
         consumer_key=os.getenv('WC_CONSUMER_KEY'),
         consumer_secret=os.getenv('WC_CONSUMER_SECRET'),
+        retry_policy=retry_policy,
+        variation_concurrency=config.get('upload', {}).get('variation_concurrency', 4),
     )
     await woo_client.init_session()
-    async with ThePoizonClient(api_key=os.getenv('POIZON_API_KEY')) as pz_client:
-        for brand_name, brand_ids in brands.items():
-            spus = await collect_spu_from_poizon(brand_name=brand_name,
-                                                 brand_ids=brand_ids,
-                                                 max_pages=MAX_PAGES,
-                                                 max_products=MAX_PRODUCTS_PER_BRAND,
-                                                 client=pz_client,
-                                                 mapper=SPUMapper,
-                                                 )
-            old_spus = await collect_spus_from_last_top(new_top=spus,
-                                                        woo_client=woo_client,
-                                                        pz_client=pz_client,
-                                                        brand=brand_name,
-                                                        )
-            spus.extend(old_spus)
-
-            await upload_all_spus_to_woocommerce(spus=spus,
-                                                 client=woo_client,
-                                                 config=config,
-                                                 mapper=SPUMapper, )
+    await woo_client.warm_reference_cache()
+    started = time.perf_counter()
+    rate_limit = config.get('poizon', {}).get('rate_limit', {})
+    rate_limiter = AdaptiveRateLimiter(rate=rate_limit.get('initial', 2.0),
+                                       min_rate=rate_limit.get('min', 0.5),
+                                       max_rate=rate_limit.get('max', 10.0))
+    cache_config = config.get('poizon', {}).get('cache', {})
+    cache = None
+    if cache_config.get('enabled'):
+        cache = ProductInfoCache(cache_config.get('path', 'cache/product_info.sqlite3'),
+                                 ttl=cache_config.get('ttl', 24 * 3600),
+                                 max_entries=cache_config.get('max_entries', 20000),
+                                 price_ttl=cache_config.get('price_ttl'))
+    journal = RunJournal(config.get('journal', {}).get('path', 'cache/run_journal.sqlite3'))
+    run_id = journal.start_run(resume=resume)
+    logger.info(f'Запуск #{run_id}' + (' (продолжение)' if resume else ''))
+    async with ThePoizonClient(api_key=os.getenv('POIZON_API_KEY'),
+                               rate_limiter=rate_limiter,
+                               cache=cache,
+                               retry_policy=retry_policy) as pz_client:
+        timings = await sync_all_brands(pz_client=pz_client,
+                                        woo_client=woo_client,
+                                        concurrency=brands_concurrency,
+                                        journal=journal)
     await woo_client.close()
+    # Запуск считается завершённым, только если все бренды выгружены без ошибок
+    if journal.finished_brands() >= set(brands):
+        journal.finish_run()
+    journal.close()
+    for brand_name, elapsed in timings.items():
+        logger.info(f'  {brand_name}: ' + (f'{elapsed:.1f} сек.' if elapsed is not None else 'ошибка'))
+    logger.info(f'Синхронизация завершена за {time.perf_counter() - started:.1f} сек.')
+    run_metrics.write(json_path=LOG_DIR / "run_summary.json", prometheus_path=LOG_DIR / "metrics.prom")
+
 
 if __name__ == '__main__':
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description='Синхронизация товаров Poizon с WooCommerce')
+    parser.add_argument('--resume', action='store_true',
+                        help='продолжить последний незавершённый запуск по журналу')
+    args = parser.parse_args()
+    asyncio.run(main(resume=args.resume))
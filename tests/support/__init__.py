@@ -0,0 +1,3 @@
+"""
+Общие заглушки и фабрики данных для тестов и бенчмарков.
+"""
@@ -0,0 +1,52 @@
+"""
+Синтетические данные для тестов и бенчмарков: ответы product-info и товары WooCommerce.
+"""
+from infrastracture.mappers import SPUMapper
+
+
+def make_product_info(spu_id: int, sizes: int, dimensions: int = 3) -> dict:
+    """
+    Синтетический ответ product-info: `sizes` размеров и `dimensions` свойств продажи (EU/US/RU...).
+    """
+    keys = ["EU", "US", "RU", "UK", "CM"][:dimensions]
+    sale_properties = [{
+        "level": 1,
+        "propertyList": [{
+            "propertyKey": key,
+            "propertyItemModels": [{"propertyValueId": 1000 + i, "name": "Размер",
+                                    "value": f"{key} {36 + i * 0.5}"} for i in range(sizes)],
+        } for key in keys],
+    }, {
+        "level": 2,
+        "propertyList": [{
+            "propertyKey": "Color",
+            "propertyItemModels": [{"propertyValueId": 1, "name": "Версия", "value": "black"}],
+        }],
+    }]
+    skus = [{
+        "skuId": spu_id * 1000 + i,
+        "properties": [{"level": 1, "propertyValueId": 1000 + i}, {"level": 2, "propertyValueId": 1}],
+        "skuSpeedInfo": [{"speedPrice": {"money": {"minUnitVal": 1500000 + i * 100}}}],
+    } for i in range(sizes)]
+    return {
+        "shareInfo": {"shareTitle": f"Sneaker {spu_id}",
+                      "shareUrl": f"https://thepoizon.ru/product/sneaker-{spu_id}"},
+        "price": {"money": {"minUnitVal": 1500000}},
+        "imageModels": [{"url": f"https://img/{spu_id}/{i}.jpg"} for i in range(8)],
+        "brandItemsModel": {"brandName": "Nike"},
+        "baseProperties": [{"key": "Артикул", "value": f"ART-{spu_id}", "itemType": "ARTICLE_NUMBER"},
+                           {"key": "Материал", "value": "Текстиль"}],
+        "buyDialogModel": {"detail": {"spuId": spu_id, "categoryId": 30},
+                           "saleProperties": sale_properties,
+                           "skus": skus},
+    }
+
+
+def woo_payload(spu_id: int = 1, sizes: int = 12, price_step: int = 100) -> tuple[dict, list[dict]]:
+    """
+    Товар и вариации для WooCommerce из синтетического ответа; цены размеров растут на `price_step`.
+    """
+    info = make_product_info(spu_id, sizes)
+    for i, sku in enumerate(info["buyDialogModel"]["skus"]):
+        sku["skuSpeedInfo"][0]["speedPrice"]["money"]["minUnitVal"] = 1500000 + i * price_step
+    return SPUMapper.from_domain_to_woocomerce(SPUMapper.from_poizon_to_domain(info))
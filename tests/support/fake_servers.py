@@ -0,0 +1,309 @@
+"""
+Локальные заглушки Poizon API и WooCommerce REST API (aiohttp) для тестов и бенчмарков синхронизации.
+
+Обе заглушки поддерживают задержку ответа, долю ошибок (503) и размер каталога,
+а также считают запросы по эндпоинтам.
+"""
+import asyncio
+import random
+from collections import Counter
+from contextlib import asynccontextmanager
+
+from aiohttp import web
+
+from infrastracture.woo_client import AsyncWooClient
+from tests.support.factories import make_product_info
+
+
+class FakeServer:
+    def __init__(self, *, latency: float = 0.0, error_rate: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.requests = Counter()
+        self.app = web.Application(middlewares=[self._middleware])
+        self._runner: web.AppRunner | None = None
+        self.port: int | None = None
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler):
+        route = request.match_info.route.resource.canonical if request.match_info.route.resource else request.path
+        self.requests[f"{request.method} {route}"] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.error_rate and self.random.random() < self.error_rate:
+            return web.json_response({"message": "Service Unavailable"}, status=503)
+        return await handler(request)
+
+    @property
+    def total_requests(self) -> int:
+        return sum(self.requests.values())
+
+    async def start(self):
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, "127.0.0.1", 0).start()
+        self.port = self._runner.addresses[0][1]
+
+    async def stop(self):
+        await self._runner.cleanup()
+
+
+class FakePoizonServer(FakeServer):
+    """
+    `poizon-api/search` и `poizon-api/product-info/{spu_id}`.
+    Для каждого бренда в каталоге `catalog_size` товаров с `sizes` размерами.
+    """
+    PREFIX = "/api/poizon-ru/poizon-api"
+
+    def __init__(self, *, brands: dict[str, list[int]], catalog_size: int = 100, sizes: int = 20, **kwargs):
+        super().__init__(**kwargs)
+        self.brands = brands
+        self.catalog_size = catalog_size
+        self.sizes = sizes
+        self.app.router.add_get(f"{self.PREFIX}/search", self.search)
+        self.app.router.add_get(f"{self.PREFIX}/product-info/{{spu_id}}", self.product_info)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/api/poizon-ru/"
+
+    def spu_ids(self, brand_name: str) -> list[int]:
+        offset = (list(self.brands).index(brand_name) + 1) * 1_000_000
+        return [offset + n for n in range(self.catalog_size)]
+
+    async def search(self, request: web.Request):
+        keyword = request.query.get("keyword")
+        page = int(request.query.get("page", 1))
+        page_size = int(request.query.get("pageSize", 20))
+        if keyword not in self.brands:
+            return web.json_response({"searchSpuList": {"spuList": []}})
+        spu_ids = self.spu_ids(keyword)[(page - 1) * page_size:page * page_size]
+        return web.json_response({"searchSpuList": {"spuList": [
+            {"spuId": spu_id, "brandId": self.brands[keyword][0], "title": f"{keyword} sneaker {spu_id}",
+             "price": 1500000 + spu_id % 1000 * 100}
+            for spu_id in spu_ids
+        ]}})
+
+    async def product_info(self, request: web.Request):
+        spu_id = int(request.match_info["spu_id"])
+        return web.json_response(make_product_info(spu_id, self.sizes))
+
+
+class FakeWooServer(FakeServer):
+    """
+    Минимальная реализация `wp-json/wc/v3` в памяти: товары (в т.ч. batch), вариации,
+    бренды, атрибуты с терминами и категории. Пагинация с заголовками X-WP-Total / X-WP-TotalPages.
+    """
+    PREFIX = "/wp-json/wc/v3"
+    PRODUCT_WRITES = (f"POST {PREFIX}/products", f"PUT {PREFIX}/products/{{product_id}}",
+                      f"POST {PREFIX}/products/batch", f"POST {PREFIX}/products/{{product_id}}/variations/batch")
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._ids = iter(range(1, 10 ** 9))
+        self.products: dict[int, dict] = {}
+        self.variations: dict[int, dict[int, dict]] = {}
+        self.brands: dict[int, dict] = {}
+        self.attributes: dict[int, dict] = {}
+        self.terms: dict[int, dict[int, dict]] = {}
+        self.categories: dict[int, dict] = {}
+        r = self.app.router
+        r.add_get(f"{self.PREFIX}/products", self.list_products)
+        r.add_post(f"{self.PREFIX}/products", self.create_product)
+        r.add_post(f"{self.PREFIX}/products/batch", self.batch_products)
+        r.add_get(f"{self.PREFIX}/products/brands", self.list_brands)
+        r.add_post(f"{self.PREFIX}/products/brands", self.create_brand)
+        r.add_get(f"{self.PREFIX}/products/attributes", self.list_attributes)
+        r.add_post(f"{self.PREFIX}/products/attributes", self.create_attribute)
+        r.add_get(f"{self.PREFIX}/products/attributes/{{attr_id}}/terms", self.list_terms)
+        r.add_post(f"{self.PREFIX}/products/attributes/{{attr_id}}/terms", self.create_term)
+        r.add_get(f"{self.PREFIX}/products/categories", self.list_categories)
+        r.add_post(f"{self.PREFIX}/products/categories", self.create_category)
+        r.add_get(f"{self.PREFIX}/products/{{product_id}}", self.get_product)
+        r.add_put(f"{self.PREFIX}/products/{{product_id}}", self.update_product)
+        r.add_delete(f"{self.PREFIX}/products/{{product_id}}", self.delete_product)
+        r.add_get(f"{self.PREFIX}/products/{{product_id}}/variations", self.list_variations)
+        r.add_post(f"{self.PREFIX}/products/{{product_id}}/variations/batch", self.batch_variations)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def product_writes(self) -> dict[str, int]:
+        """
+        Число запросов, сохраняющих товары и вариации, по маршрутам (только ненулевые).
+        """
+        return {route: self.requests[route] for route in self.PRODUCT_WRITES if self.requests[route]}
+
+    # --- helpers ---
+
+    @staticmethod
+    def _paginate(request: web.Request, items: list[dict]) -> web.Response:
+        per_page = int(request.query.get("per_page", 10))
+        page = int(request.query.get("page", 1))
+        fields = request.query.get("_fields")
+        chunk = items[(page - 1) * per_page:page * per_page]
+        if fields:
+            keys = fields.split(",")
+            chunk = [{key: item[key] for key in keys if key in item} for item in chunk]
+        total_pages = max(1, -(-len(items) // per_page))
+        return web.json_response(chunk, headers={"X-WP-Total": str(len(items)),
+                                                 "X-WP-TotalPages": str(total_pages)})
+
+    @staticmethod
+    def _merge_meta(current: list[dict], updates: list[dict]) -> list[dict]:
+        merged = {meta["key"]: meta for meta in current}
+        merged.update({meta["key"]: meta for meta in updates})
+        return list(merged.values())
+
+    def _save_product(self, data: dict, product: dict = None) -> dict:
+        product = product or {"id": next(self._ids), "meta_data": [], "brands": [], "attributes": []}
+        for key, value in data.items():
+            if key == "meta_data":
+                product["meta_data"] = self._merge_meta(product["meta_data"], value)
+            elif key == "brands":
+                product["brands"] = [self.brands.get(b.get("id"), b) for b in value]
+            elif key != "id":
+                product[key] = value
+        self.products[product["id"]] = product
+        self.variations.setdefault(product["id"], {})
+        return product
+
+    def add_product(self, *, sku: str, brand_name: str, spu_id: int) -> dict:
+        """Добавляет товар напрямую (для наполнения каталога перед бенчмарком)."""
+        brand = next((b for b in self.brands.values() if b["name"] == brand_name), None)
+        if brand is None:
+            brand = {"id": next(self._ids), "name": brand_name, "slug": brand_name.lower()}
+            self.brands[brand["id"]] = brand
+        return self._save_product({"sku": sku, "name": sku, "type": "variable", "brands": [brand],
+                                   "meta_data": [{"key": "_poizon_spu_id", "value": str(spu_id)}]})
+
+    # --- products ---
+
+    async def list_products(self, request: web.Request):
+        items = list(self.products.values())
+        if "sku" in request.query:
+            skus = set(request.query["sku"].split(","))
+            items = [p for p in items if p.get("sku") in skus]
+        if "brand" in request.query:
+            brand_id = int(request.query["brand"])
+            items = [p for p in items if any(b.get("id") == brand_id for b in p.get("brands", []))]
+        return self._paginate(request, items)
+
+    async def create_product(self, request: web.Request):
+        return web.json_response(self._save_product(await request.json()), status=201)
+
+    async def get_product(self, request: web.Request):
+        product = self.products.get(int(request.match_info["product_id"]))
+        if product is None:
+            return web.json_response({"code": "not_found"}, status=404)
+        return web.json_response(product)
+
+    async def update_product(self, request: web.Request):
+        product = self.products.get(int(request.match_info["product_id"]))
+        if product is None:
+            return web.json_response({"code": "not_found"}, status=404)
+        return web.json_response(self._save_product(await request.json(), product))
+
+    async def delete_product(self, request: web.Request):
+        product = self.products.pop(int(request.match_info["product_id"]), None)
+        return web.json_response(product or {"code": "not_found"}, status=200 if product else 404)
+
+    async def batch_products(self, request: web.Request):
+        data = await request.json()
+        response = {}
+        if "create" in data:
+            response["create"] = [self._save_product(item) for item in data["create"]]
+        if "update" in data:
+            response["update"] = [self._save_product(item, self.products[item["id"]])
+                                  if item.get("id") in self.products else
+                                  {"id": item.get("id"), "error": {"code": "not_found"}}
+                                  for item in data["update"]]
+        return web.json_response(response)
+
+    # --- variations ---
+
+    async def list_variations(self, request: web.Request):
+        product_id = int(request.match_info["product_id"])
+        return self._paginate(request, list(self.variations.get(product_id, {}).values()))
+
+    async def batch_variations(self, request: web.Request):
+        product_id = int(request.match_info["product_id"])
+        variations = self.variations.setdefault(product_id, {})
+        data = await request.json()
+        response = {"create": [], "update": [], "delete": []}
+        for item in data.get("create", []):
+            variation = {**item, "id": next(self._ids)}
+            variations[variation["id"]] = variation
+            response["create"].append(variation)
+        for item in data.get("update", []):
+            variation = variations.get(item["id"])
+            if variation is not None:
+                variation.update(item)
+            response["update"].append(variation or {"id": item["id"], "error": {"code": "not_found"}})
+        for item in data.get("delete", []):
+            variation_id = item["id"] if isinstance(item, dict) else item
+            response["delete"].append(variations.pop(variation_id, {"id": variation_id}))
+        return web.json_response(response)
+
+    # --- справочники ---
+
+    async def list_brands(self, request: web.Request):
+        items = list(self.brands.values())
+        if "search" in request.query:
+            search = request.query["search"].lower()
+            items = [b for b in items if search in b["name"].lower()]
+        return self._paginate(request, items)
+
+    async def create_brand(self, request: web.Request):
+        data = await request.json()
+        brand = {"id": next(self._ids), **data}
+        self.brands[brand["id"]] = brand
+        return web.json_response(brand, status=201)
+
+    async def list_attributes(self, request: web.Request):
+        return web.json_response(list(self.attributes.values()))
+
+    async def create_attribute(self, request: web.Request):
+        data = await request.json()
+        attr = {"id": next(self._ids), "slug": data["name"], **data}
+        self.attributes[attr["id"]] = attr
+        self.terms[attr["id"]] = {}
+        return web.json_response(attr, status=201)
+
+    async def list_terms(self, request: web.Request):
+        return self._paginate(request, list(self.terms.get(int(request.match_info["attr_id"]), {}).values()))
+
+    async def create_term(self, request: web.Request):
+        terms = self.terms.setdefault(int(request.match_info["attr_id"]), {})
+        term = {"id": next(self._ids), **(await request.json())}
+        terms[term["id"]] = term
+        return web.json_response(term, status=201)
+
+    async def list_categories(self, request: web.Request):
+        items = list(self.categories.values())
+        if "slug" in request.query:
+            items = [c for c in items if c["slug"] == request.query["slug"]]
+        return self._paginate(request, items)
+
+    async def create_category(self, request: web.Request):
+        category = {"id": next(self._ids), **(await request.json())}
+        self.categories[category["id"]] = category
+        return web.json_response(category, status=201)
+
+
+@asynccontextmanager
+async def woo_client_session(server: FakeWooServer = None):
+    """
+    Запускает `server` (по умолчанию `FakeWooServer`) и отдаёт `(server, client)` с открытой сессией клиента.
+    """
+    server = server or FakeWooServer()
+    await server.start()
+    client = AsyncWooClient(server.url, "ck", "cs")
+    await client.init_session()
+    try:
+        yield server, client
+    finally:
+        await client.close()
+        await server.stop()
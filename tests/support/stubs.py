@@ -0,0 +1,52 @@
+"""
+Заглушки клиентов Poizon и WooCommerce в памяти, без HTTP: для тестов конвейера и main.
+"""
+import asyncio
+
+from tests.support.factories import make_product_info
+
+
+class PoizonStub:
+    """
+    `pages` страниц поиска по каждому бренду из `brands` (название -> brandId).
+    У SPU из `broken_prices` цены размеров не числа, на них падает расчёт цен.
+    """
+
+    def __init__(self, pages: int = 3, broken_prices: set = frozenset(), brands: dict[str, int] = None):
+        self.pages = pages
+        self.broken_prices = broken_prices
+        self.brands = brands or {"Nike": 144}
+        self.product_info_calls = 0
+
+    async def search_products(self, keyword, page, page_size=20):
+        if page > self.pages or keyword not in self.brands:
+            return []
+        offset = list(self.brands).index(keyword) * 100_000
+        return [{"brandId": self.brands[keyword], "title": f"t{page}-{i}", "spuId": offset + page * 100 + i}
+                for i in range(page_size)]
+
+    async def get_product_info(self, spu_id):
+        self.product_info_calls += 1
+        await asyncio.sleep(0)
+        info = make_product_info(spu_id, 5)
+        if spu_id in self.broken_prices:
+            for sku in info["buyDialogModel"]["skus"]:
+                sku["skuSpeedInfo"][0]["speedPrice"]["money"]["minUnitVal"] = "n/a"
+        return info
+
+
+class WooStub:
+    def __init__(self):
+        self.uploaded = []
+
+    async def get_spu_ids_by_brand_index(self) -> dict[str, list[int]]:
+        return {}
+
+    async def create_or_update_variable_product_with_variations(self, base, variations):
+        await asyncio.sleep(0.001)
+        self.uploaded.append(base["spu_id"])
+        return 201, {"id": len(self.uploaded)}
+
+    async def update_product_prices(self, base, variations):
+        self.uploaded.append(base["spu_id"])
+        return 200, {"id": len(self.uploaded)}
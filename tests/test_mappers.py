@@ -0,0 +1,69 @@
+"""
+SPUMapper на сохранённых ответах product-info (tests/fixtures/product_info):
+индексное разрешение свойств SKU даёт тот же результат, что и прежний полный перебор.
+"""
+import json
+from pathlib import Path
+
+import pytest
+
+from infrastracture.mappers import SPUMapper
+
+FIXTURES = sorted((Path(__file__).parent / "fixtures" / "product_info").glob("*.json"))
+
+
+def legacy_sku_vars(data: dict, pz_sku: dict) -> dict:
+    # Прежняя реализация: перебор всех свойств продажи для каждого свойства SKU
+    vars_ = {}
+    for prop in pz_sku.get('properties', []):
+        level = prop.get('level')
+        prop_val_id = prop.get('propertyValueId')
+        for sale_prop in data.get('buyDialogModel', {}).get('saleProperties', []):
+            for prop_ in sale_prop.get('propertyList', []):
+                for prop_item_model in prop_.get('propertyItemModels', {}):
+                    if level == sale_prop.get('level') and prop_item_model.get('propertyValueId') == prop_val_id:
+                        name = prop_item_model['name'].lower()
+                        name = SPUMapper.RU_ENG.get(name, name)
+                        vars_.update({f"{prop_['propertyKey'].lower()}_{name}": prop_item_model['value']})
+    return vars_
+
+
+def legacy_skus(data: dict) -> list[tuple]:
+    skus = []
+    for pz_sku in data.get('buyDialogModel', {}).get('skus', []):
+        vars_ = legacy_sku_vars(data, pz_sku)
+        regular_price = pz_sku.get('skuSpeedInfo', [{}])[0].get('speedPrice', {}).get('money', {}).get('minUnitVal')
+        if regular_price and 'eu_size' in vars_:
+            skus.append((pz_sku.get('skuId'), regular_price, vars_))
+    return skus
+
+
+@pytest.fixture(params=FIXTURES, ids=[path.stem for path in FIXTURES])
+def product_info(request) -> dict:
+    return json.loads(request.param.read_text(encoding="utf-8"))
+
+
+def test_fixtures_present():
+    assert len(FIXTURES) >= 3
+
+
+def test_sku_resolution_matches_legacy(product_info):
+    spu = SPUMapper.from_poizon_to_domain(product_info)
+
+    resolved = [(sku.sku_code, sku.regular_price, sku.vars) for sku in spu.skus]
+    assert resolved == legacy_skus(product_info)
+    # Порядок ключей вариантов тоже сохраняется
+    assert [list(sku.vars) for sku in spu.skus] == [list(vars_) for *_, vars_ in legacy_skus(product_info)]
+
+
+def test_woocommerce_payload_matches_legacy(product_info):
+    spu = SPUMapper.from_poizon_to_domain(product_info)
+    base, variations = SPUMapper.from_domain_to_woocomerce(spu)
+
+    specs = [(prop['key'], prop['value']) for prop in product_info.get('baseProperties', [])]
+    assert base["description"] == '\n'.join(': '.join(spec) for spec in specs)
+    assert variations == [{
+        "regular_price": f"{price}",
+        "sku": f"{spu.article_code}-{sku_code}",
+        "attributes": [{"name": "pa_eu_size", "option": vars_["eu_size"]}],
+    } for sku_code, price, vars_ in legacy_skus(product_info)]
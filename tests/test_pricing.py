@@ -0,0 +1,98 @@
+"""
+Эталонные цены PricingEngine для режимов thepoizon и dewu.
+"""
+import random
+
+import pytest
+
+from application import pricing
+from application.pricing import PricingEngine
+from domain import SKU, SPU
+
+INPUTS = [0, 99, 100, 150, 250, 1000, 89900, 263200, 1500000, 1234567, 20908333, 59192728]
+GOLDEN = {
+    "thepoizon": [0, 0, 1, 1, 2, 8, 719, 2106, 12000, 9876, 167266, 473542],
+    "dewu": [1433, 1433, 1433, 1433, 1433, 1434, 1490, 1600, 2381, 2213, 14650, 38850],
+}
+# Цены, для которых (цена в юанях - 2632) ровно кратна 15.82
+DEWU_EXACT_MULTIPLES = [20908333, 59192728, 95499628, 65678926, 25970727]
+
+
+def legacy_calculate_price(value: int, *, mode: str, x: int, y: int, z: int) -> int:
+    # Прежний domain.calculate_price (без async)
+    price = value // 100
+    if mode == 'thepoizon':
+        price = round(price * 0.8)
+    elif mode == 'dewu':
+        price = (price - 2632) // 15.82
+        price = round(price + x + y + z)
+    return price
+
+
+def engine(mode: str) -> PricingEngine:
+    return PricingEngine(mode, x=100, y=500, z=1000)
+
+
+@pytest.mark.parametrize("mode", ["thepoizon", "dewu"])
+def test_golden_prices(mode):
+    assert [engine(mode).price(value) for value in INPUTS] == GOLDEN[mode]
+
+
+def test_thepoizon_matches_legacy():
+    values = INPUTS + list(range(0, 500_000, 37))
+    assert ([engine("thepoizon").price(value) for value in values]
+            == [legacy_calculate_price(value, mode="thepoizon", x=100, y=500, z=1000) for value in values])
+
+
+def test_dewu_matches_legacy_except_exact_multiples():
+    values = INPUTS + list(range(0, 500_000, 37))
+    for value in values:
+        expected = legacy_calculate_price(value, mode="dewu", x=100, y=500, z=1000)
+        if (value // 100 - 2632) * 50 % 791 == 0:
+            continue  # кратные 15.82 — см. test_dewu_exact_multiple_of_rate_is_not_floored_down
+        assert engine("dewu").price(value) == expected, value
+
+
+@pytest.mark.parametrize("value", DEWU_EXACT_MULTIPLES)
+def test_dewu_exact_multiple_of_rate_is_not_floored_down(value):
+    # float: (p - 2632) // 15.82 теряет единицу из-за двоичного представления 15.82
+    exact = (value // 100 - 2632) * 50 // 791 + 1600
+    assert engine("dewu").price(value) == exact
+    assert legacy_calculate_price(value, mode="dewu", x=100, y=500, z=1000) == exact - 1
+
+
+def test_thepoizon_rounds_half_to_even():
+    half = PricingEngine("thepoizon", coefficient="0.5")
+    assert [half.price(p * 100) for p in range(1, 12)] == [round(p * 0.5) for p in range(1, 12)]
+
+
+@pytest.mark.skipif(pricing.np is None, reason="NumPy не установлен")
+@pytest.mark.parametrize("mode", ["thepoizon", "dewu"])
+@pytest.mark.parametrize("coefficient", ["0.8", "0.85", "0.5"])
+def test_numpy_matches_pure_python(mode, coefficient, monkeypatch):
+    rng = random.Random(1)
+    values = INPUTS + DEWU_EXACT_MULTIPLES + [rng.randint(0, 10 ** 8) for _ in range(5000)]
+    priced = PricingEngine(mode, x=100, y=500, z=1000, coefficient=coefficient)
+
+    with_numpy = priced.price_many(values)
+    monkeypatch.setattr(pricing, "np", None)
+    assert with_numpy == priced.price_many(values)
+    assert all(type(price) is int for price in with_numpy)
+
+
+def test_price_spus_safe_skips_only_broken_spus():
+    good = SPU(id_=1, title="good", skus=[SKU(regular_price=1500000), SKU(regular_price=None)])
+    broken = SPU(id_=2, title="broken", skus=[SKU(regular_price="n/a")])
+
+    priced, failed = engine("thepoizon").price_spus_safe([good, broken])
+
+    assert priced == [good] and [spu for spu, _ in failed] == [broken]
+    assert [sku.regular_price for sku in good.skus] == [12000, None]
+    assert broken.skus[0].regular_price == "n/a"
+
+
+def test_from_config_reuses_engine():
+    config = {"pricing": {"mode": "dewu", "X": 100, "Y": 500, "Z": 1000,
+                          "exchange_rate": 15.82, "coefficient": 0.8}}
+    assert PricingEngine.from_config(config) is PricingEngine.from_config(dict(config))
+    assert PricingEngine.from_config(config).price(20908333) == GOLDEN["dewu"][10]
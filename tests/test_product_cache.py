@@ -0,0 +1,108 @@
+"""
+ProductInfoCache: TTL, свежесть цен (`price_ttl`) и LRU-вытеснение.
+"""
+import asyncio
+
+import pytest
+
+from infrastracture import product_cache
+from infrastracture.product_cache import ProductInfoCache
+
+
+class Clock:
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(product_cache.time, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def make_cache(tmp_path):
+    caches = []
+
+    def make(**kwargs) -> ProductInfoCache:
+        caches.append(ProductInfoCache(tmp_path / "cache.sqlite3", **kwargs))
+        return caches[-1]
+
+    yield make
+    for cache in caches:
+        cache.close()
+
+
+def test_entry_expires_after_ttl(clock, make_cache):
+    cache = make_cache(ttl=60)
+    cache.set(1, {"spuId": 1})
+
+    clock.now += 59
+    assert cache.get(1) == {"spuId": 1}
+    clock.now += 1
+    assert cache.get(1) is None
+    # Истёкшая запись удаляется и не годится даже как запасная копия
+    assert cache.get(1, allow_stale_prices=True) is None
+
+
+def test_per_entry_ttl_overrides_default(clock, make_cache):
+    cache = make_cache(ttl=60)
+    cache.set(1, {"spuId": 1}, ttl=10)
+
+    clock.now += 10
+    assert cache.get(1) is None
+
+
+def test_stale_prices_are_only_a_fallback(clock, make_cache):
+    cache = make_cache(ttl=3600, price_ttl=60)
+    cache.set(1, {"spuId": 1})
+
+    clock.now += 30
+    assert cache.get(1) == {"spuId": 1}
+    clock.now += 31
+    # Цены устарели: как свежая запись не отдаётся, но остаётся запасной копией до ttl
+    assert cache.get(1) is None
+    assert cache.get(1, allow_stale_prices=True) == {"spuId": 1}
+    clock.now += 3600
+    assert cache.get(1, allow_stale_prices=True) is None
+
+
+def test_least_recently_read_entries_are_evicted(clock, make_cache, monkeypatch):
+    monkeypatch.setattr(ProductInfoCache, "EVICT_EVERY", 1)
+    cache = make_cache(max_entries=2)
+    cache.set(1, {"spuId": 1})
+    clock.now += 1
+    cache.set(2, {"spuId": 2})
+    clock.now += 1
+    cache.get(1)  # 1 прочитан позже 2
+    clock.now += 1
+
+    cache.set(3, {"spuId": 3})
+
+    assert [cache.get(spu_id) is not None for spu_id in (1, 2, 3)] == [True, False, True]
+
+
+def test_eviction_runs_every_n_writes(clock, make_cache, monkeypatch):
+    monkeypatch.setattr(ProductInfoCache, "EVICT_EVERY", 3)
+    cache = make_cache(max_entries=1)
+    for spu_id in (1, 2):
+        clock.now += 1
+        cache.set(spu_id, {"spuId": spu_id})
+    assert cache.get(1) is not None and cache.get(2) is not None
+
+    clock.now += 1
+    cache.set(3, {"spuId": 3})
+
+    assert [cache.get(spu_id) is not None for spu_id in (1, 2, 3)] == [False, False, True]
+
+
+def test_async_access_persists_between_instances(clock, make_cache):
+    async def run():
+        await make_cache().aset(1, {"spuId": 1, "title": "Кроссовки"})
+        return await make_cache().aget(1)
+
+    assert asyncio.run(run()) == {"spuId": 1, "title": "Кроссовки"}
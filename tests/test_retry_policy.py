@@ -0,0 +1,65 @@
+"""
+RetryPolicy и CircuitBreaker.
+"""
+import asyncio
+import time
+
+import pytest
+
+from infrastracture.retry_policy import CircuitOpenError, RetryableHTTPError, RetryPolicy
+
+
+def open_breaker(policy: RetryPolicy, host: str):
+    breaker = policy.breaker(host)
+    for _ in range(policy.failure_threshold):
+        breaker.on_failure()
+    # reset_timeout уже прошёл: следующий запрос будет пробным (half-open)
+    breaker.opened_at = time.monotonic() - policy.reset_timeout - 1
+    return breaker
+
+
+def test_cancelled_probe_does_not_leave_breaker_stuck():
+    policy = RetryPolicy(retries=1, failure_threshold=2, reset_timeout=10)
+    open_breaker(policy, "host")
+
+    async def run():
+        probe = asyncio.create_task(policy.call("host", asyncio.sleep, 10))
+        await asyncio.sleep(0)
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+
+        async def ok():
+            return "ok"
+        # Следующий запрос снова может стать пробным и замкнуть цепь
+        return await policy.call("host", ok)
+
+    assert asyncio.run(run()) == "ok"
+    assert policy.breaker("host").opened_at is None
+
+
+def test_rate_limit_responses_do_not_open_breaker():
+    policy = RetryPolicy(retries=10, failure_threshold=3)
+    calls = 0
+
+    async def throttled():
+        nonlocal calls
+        calls += 1
+        if calls < 8:
+            raise RetryableHTTPError(429, "Too Many Requests", retry_after=0)
+        return "ok"
+
+    assert asyncio.run(policy.call("host", throttled)) == "ok"
+    assert policy.breaker("host").failures == 0
+
+
+def test_server_errors_open_breaker():
+    policy = RetryPolicy(retries=3, base_delay=0, failure_threshold=3)
+
+    async def unavailable():
+        raise RetryableHTTPError(503, "Service Unavailable")
+
+    with pytest.raises(RetryableHTTPError):
+        asyncio.run(policy.call("host", unavailable))
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(policy.call("host", unavailable))
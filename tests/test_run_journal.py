@@ -0,0 +1,92 @@
+"""
+RunJournal и продолжение прерванного запуска (`--resume`) в `main.sync_all_brands`.
+"""
+import asyncio
+
+import pytest
+
+import main
+from infrastracture.run_journal import RunJournal
+from tests.support.stubs import PoizonStub, WooStub
+
+BRANDS = {"Nike": [144], "Jordan": [13]}
+CONFIG = {
+    "pricing": {"mode": "thepoizon", "X": 100, "Y": 500, "Z": 1000},
+    "upload": {"concurrency": 2, "batch_size": 1},
+    "poizon": {"search_prefetch": 1},
+}
+
+
+@pytest.fixture
+def journal_path(tmp_path):
+    return tmp_path / "journal.sqlite3"
+
+
+@pytest.fixture(autouse=True)
+def small_sync(monkeypatch):
+    monkeypatch.setattr(main, "config", CONFIG)
+    monkeypatch.setattr(main, "MAX_PRODUCTS_PER_BRAND", 10)
+
+
+def sync(journal: RunJournal, pz: PoizonStub, woo: WooStub):
+    return asyncio.run(main.sync_all_brands(pz_client=pz, woo_client=woo, concurrency=2,
+                                            brands=BRANDS, journal=journal))
+
+
+def test_resume_continues_last_unfinished_run(journal_path):
+    journal = RunJournal(journal_path)
+    first = journal.start_run()
+    journal.mark_brand_finished("Nike")
+    journal.mark_fetched(101, "Jordan")
+    journal.mark_uploaded(101, 7)
+    journal.mark_fetched(102, "Jordan")
+    journal.close()
+
+    resumed = RunJournal(journal_path)
+    assert resumed.start_run(resume=True) == first
+    assert resumed.finished_brands() == {"Nike"}
+    # Загруженный, но не выгруженный SPU будет обработан заново
+    assert resumed.uploaded_spu_ids() == {101}
+    resumed.finish_run()
+    resumed.close()
+
+    fresh = RunJournal(journal_path)
+    assert fresh.start_run(resume=True) != first
+    assert fresh.finished_brands() == set() and fresh.uploaded_spu_ids() == set()
+    fresh.close()
+
+
+def test_async_marks_are_written(journal_path):
+    journal = RunJournal(journal_path)
+    journal.start_run()
+
+    async def run():
+        await asyncio.gather(*(journal.amark_fetched(spu_id, "Nike") for spu_id in range(50)))
+        await asyncio.gather(*(journal.amark_uploaded(spu_id, spu_id + 1) for spu_id in range(0, 50, 2)))
+
+    asyncio.run(run())
+
+    assert journal.uploaded_spu_ids() == set(range(0, 50, 2))
+    journal.close()
+
+
+def test_brand_with_failed_uploads_is_retried_on_resume(journal_path):
+    journal = RunJournal(journal_path)
+    journal.start_run()
+    woo = WooStub()
+    sync(journal, PoizonStub(broken_prices={100101}, brands={"Nike": 144, "Jordan": 13}), woo)
+
+    # Jordan не отмечен завершённым: один его SPU не выгружен
+    assert journal.finished_brands() == {"Nike"}
+    assert len(woo.uploaded) == 19 and 100101 not in woo.uploaded
+    journal.close()
+
+    journal = RunJournal(journal_path)
+    journal.start_run(resume=True)
+    woo = WooStub()
+    sync(journal, PoizonStub(brands={"Nike": 144, "Jordan": 13}), woo)
+
+    # Повторяется только невыгруженный SPU, Nike пропускается целиком
+    assert woo.uploaded == [100101]
+    assert journal.finished_brands() == {"Nike", "Jordan"}
+    journal.close()
@@ -0,0 +1,66 @@
+"""
+Конвейер бренда на заглушках клиентов: сбор -> цены -> выгрузка.
+"""
+import asyncio
+
+import pytest
+
+from application.services import SPURegistry
+from application.use_cases.sync_brand_pipeline import sync_brand_pipeline
+from infrastracture.mappers import SPUMapper
+from tests.support.stubs import PoizonStub, WooStub
+
+CONFIG = {
+    "pricing": {"mode": "thepoizon", "X": 100, "Y": 500, "Z": 1000},
+    "upload": {"concurrency": 2, "batch_size": 1},
+    "pipeline": {"queue_size": 2},
+    "poizon": {"search_prefetch": 1},
+}
+
+
+class FailingJournal:
+    async def amark_fetched(self, spu_id, brand):
+        pass
+
+    async def amark_uploaded(self, spu_id, product_id):
+        raise RuntimeError("journal is unavailable")
+
+
+def run_pipeline(woo, pz, config=CONFIG, registry: SPURegistry = None, **kwargs):
+    return sync_brand_pipeline(brand_name="Nike", brand_ids=[144], max_pages=10, max_products=25,
+                               pz_client=pz, woo_client=woo, mapper=SPUMapper, config=config,
+                               catalog_index={"nike": [101, 5000, 5001]}, registry=registry or SPURegistry(), **kwargs)
+
+
+def test_pipeline_uploads_new_and_previous_top():
+    woo, pz = WooStub(), PoizonStub()
+
+    results = asyncio.run(run_pipeline(woo, pz))
+
+    # 25 товаров нового топа + 2 товара прошлого топа (101 уже в новом топе)
+    assert len(results) == 27 and all(result.ok for result in results)
+    assert sorted(woo.uploaded) == sorted(result.spu_id for result in results)
+    assert pz.product_info_calls == 27
+
+
+def test_pricing_failures_are_reported_and_released():
+    woo, pz, registry = WooStub(), PoizonStub(broken_prices={102, 5000}), SPURegistry()
+
+    results = asyncio.run(run_pipeline(woo, pz, registry=registry))
+
+    assert len(results) == 27
+    assert sorted(result.spu_id for result in results if not result.ok) == [102, 5000]
+    assert 102 not in woo.uploaded and 5000 not in woo.uploaded
+    # Закрепление за выгрузкой снято: SPU можно выгрузить повторно
+    assert registry.claim(102, SPURegistry.UPLOAD) and registry.claim(5000, SPURegistry.UPLOAD)
+
+
+def test_stage_failure_cancels_pipeline_instead_of_hanging():
+    woo, pz = WooStub(), PoizonStub()
+
+    async def run():
+        # Очереди маленькие: без отмены этап сбора навсегда встал бы на put()
+        await asyncio.wait_for(run_pipeline(woo, pz, journal=FailingJournal()), timeout=5)
+
+    with pytest.raises(RuntimeError, match="journal is unavailable"):
+        asyncio.run(run())
@@ -0,0 +1,76 @@
+"""
+ThePoizonClient на заглушке `FakePoizonServer`: ответы, которые не являются JSON.
+"""
+import asyncio
+
+import pytest
+from aiohttp import web
+
+from infrastracture.product_cache import ProductInfoCache
+from infrastracture.rate_limiter import AdaptiveRateLimiter
+from infrastracture.retry_policy import RetryableHTTPError, RetryPolicy
+from infrastracture.thepoizon_client import ThePoizonClient
+from tests.support.fake_servers import FakePoizonServer
+
+MAINTENANCE_PAGE = "<html><body>Технические работы</body></html>"
+
+
+class MaintenancePoizonServer(FakePoizonServer):
+    """Первые `failures` запросов отвечает 200 с HTML-страницей обслуживания."""
+
+    def __init__(self, *, failures: int = 1, **kwargs):
+        super().__init__(brands={"Nike": [144]}, catalog_size=40, **kwargs)
+        self.failures = failures
+
+    def _maintenance(self):
+        if self.failures > 0:
+            self.failures -= 1
+            return web.Response(text=MAINTENANCE_PAGE, content_type="text/html")
+        return None
+
+    async def search(self, request: web.Request):
+        return self._maintenance() or await super().search(request)
+
+    async def product_info(self, request: web.Request):
+        return self._maintenance() or await super().product_info(request)
+
+
+async def call_client(server: FakePoizonServer, method: str, *args, cache: ProductInfoCache = None):
+    await server.start()
+    client = ThePoizonClient("key", base_url=server.base_url, cache=cache,
+                             rate_limiter=AdaptiveRateLimiter(1000, max_rate=1000),
+                             retry_policy=RetryPolicy(retries=3, base_delay=0))
+    try:
+        async with client:
+            return await getattr(client, method)(*args)
+    finally:
+        await server.stop()
+
+
+def test_html_search_page_is_retried_not_treated_as_empty():
+    server = MaintenancePoizonServer()
+
+    products = asyncio.run(call_client(server, "search_products", "Nike", 1))
+
+    assert len(products) == 20
+    assert server.requests[f"GET {server.PREFIX}/search"] == 2
+
+
+def test_html_product_info_is_retried(tmp_path):
+    server = MaintenancePoizonServer()
+    cache = ProductInfoCache(tmp_path / "cache.sqlite3")
+
+    info = asyncio.run(call_client(server, "get_product_info", 1000001, cache=cache))
+
+    assert info["buyDialogModel"]["detail"]["spuId"] == 1000001
+    assert ProductInfoCache(tmp_path / "cache.sqlite3").get(1000001) == info
+
+
+def test_html_product_info_is_never_cached(tmp_path):
+    server = MaintenancePoizonServer(failures=3)
+    cache = ProductInfoCache(tmp_path / "cache.sqlite3")
+
+    with pytest.raises(RetryableHTTPError):
+        asyncio.run(call_client(server, "get_product_info", 1000001, cache=cache))
+
+    assert ProductInfoCache(tmp_path / "cache.sqlite3").get(1000001) is None
@@ -0,0 +1,92 @@
+"""
+Пакетная выгрузка через `products/batch` (заглушка `FakeWooServer`).
+"""
+import asyncio
+import json
+
+from aiohttp import web
+
+from infrastracture.woo_client import SYNC_HASH_META_KEY, AsyncWooClient
+from tests.support.factories import woo_payload
+from tests.support.fake_servers import FakeWooServer, woo_client_session
+
+
+class TruncatingWooServer(FakeWooServer):
+    """Отвечает на `products/batch` на один элемент меньше, чем было отправлено."""
+
+    async def batch_products(self, request: web.Request):
+        response = await super().batch_products(request)
+        data = json.loads(response.body)
+        for action in data:
+            data[action] = data[action][:-1]
+        return web.json_response(data)
+
+
+class RejectingVariationsWooServer(FakeWooServer):
+    """Отклоняет `variations/batch` для товаров с SKU из `reject_skus` и считает одновременные запросы."""
+
+    def __init__(self, reject_skus: set[str], **kwargs):
+        super().__init__(**kwargs)
+        self.reject_skus = reject_skus
+        self.in_flight = self.peak_in_flight = 0
+
+    async def batch_variations(self, request: web.Request):
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            product = self.products[int(request.match_info["product_id"])]
+            if product["sku"] in self.reject_skus:
+                return web.json_response({"code": "invalid_variation"}, status=400)
+            return await super().batch_variations(request)
+        finally:
+            self.in_flight -= 1
+
+
+async def bulk_upload(server: FakeWooServer, items):
+    async with woo_client_session(server) as (_, client):
+        return await client.bulk_create_or_update_variable_products(items)
+
+
+def test_bulk_upload_creates_all_products():
+    items = [woo_payload(spu_id) for spu_id in range(1, 4)]
+
+    results = asyncio.run(bulk_upload(FakeWooServer(), items))
+
+    assert [status for status, _ in results] == [201, 201, 201]
+
+
+def test_missing_batch_responses_become_errors():
+    items = [woo_payload(spu_id) for spu_id in range(1, 4)]
+
+    results = asyncio.run(bulk_upload(TruncatingWooServer(), items))
+
+    assert len(results) == len(items)
+    assert all(isinstance(result, dict) for _, result in results)
+    # Третий товар не вернулся в ответе create, второй — в ответе финального update
+    assert [status for status, _ in results] == [201, 400, 400]
+
+
+def test_variation_failure_is_isolated_to_its_product():
+    items = [woo_payload(spu_id) for spu_id in range(1, 4)]
+    server = RejectingVariationsWooServer(reject_skus={items[1][0]["sku"]})
+
+    results = asyncio.run(bulk_upload(server, items))
+
+    assert [status for status, _ in results] == [201, 500, 201]
+    saved = {product["sku"]: product for product in server.products.values()}
+    # Остальные товары получили финальное сохранение с хэшем, отклонённый — нет
+    assert AsyncWooClient.get_meta_value(saved[items[0][0]["sku"]], SYNC_HASH_META_KEY)
+    assert AsyncWooClient.get_meta_value(saved[items[2][0]["sku"]], SYNC_HASH_META_KEY)
+    assert not AsyncWooClient.get_meta_value(saved[items[1][0]["sku"]], SYNC_HASH_META_KEY)
+
+
+def test_variation_batches_are_bounded():
+    items = [woo_payload(spu_id) for spu_id in range(1, 11)]
+    server = RejectingVariationsWooServer(reject_skus=set())
+
+    results = asyncio.run(bulk_upload(server, items))
+
+    assert all(status == 201 for status, _ in results)
+    # По умолчанию не больше variation_concurrency=4 batch-запросов вариаций одновременно
+    assert 1 < server.peak_in_flight <= 4
@@ -0,0 +1,76 @@
+"""
+Обновление только цен и наличия (`AsyncWooClient.update_product_prices`) на заглушке `FakeWooServer`.
+"""
+import asyncio
+
+from infrastracture.woo_client import SYNC_HASH_META_KEY, AsyncWooClient
+from tests.support.factories import woo_payload
+from tests.support.fake_servers import FakeWooServer, woo_client_session
+
+
+async def sync_sequence(steps: list[tuple[str, tuple]]):
+    """
+    Выполняет шаги ("full" — полная выгрузка, "prices" — только цены) и возвращает по каждому шагу
+    (status, result), записи товаров и вариаций и хэш полной выгрузки после шага.
+    """
+    async with woo_client_session() as (server, client):
+        steps_log = []
+        for mode, (base, variations) in steps:
+            server.requests.clear()
+            if mode == "full":
+                result = await client.create_or_update_variable_product_with_variations(base, variations)
+            else:
+                result = await client.update_product_prices(base, variations)
+            [product] = server.products.values()
+            sync_hash = AsyncWooClient.get_meta_value(product, SYNC_HASH_META_KEY)
+            steps_log.append((result, server.product_writes(), sync_hash))
+    return steps_log, server
+
+
+def prices(server: FakeWooServer) -> list[str]:
+    [variations] = server.variations.values()
+    return sorted(variation["regular_price"] for variation in variations.values())
+
+
+def expected_prices(step: int) -> list[str]:
+    return sorted(variation["regular_price"] for variation in woo_payload(price_step=step)[1])
+
+
+def test_price_only_update_writes_only_variations():
+    steps, server = asyncio.run(sync_sequence([
+        ("full", woo_payload(price_step=100)),
+        ("prices", woo_payload(price_step=200)),
+    ]))
+
+    (status, result), writes, sync_hash = steps[1]
+    assert status == 200 and result["updated"] > 0
+    assert writes == {f"POST {FakeWooServer.PREFIX}/products/{{product_id}}/variations/batch": 1}
+    assert prices(server) == expected_prices(200)
+    # Цены в хэш не входят: он по-прежнему описывает товар
+    assert sync_hash == steps[0][2]
+
+
+def test_full_sync_after_price_only_update_restores_prices():
+    # Полная выгрузка P1 -> только цены P2 -> полная выгрузка P1: цены должны вернуться к P1
+    steps, server = asyncio.run(sync_sequence([
+        ("full", woo_payload(price_step=100)),
+        ("prices", woo_payload(price_step=200)),
+        ("full", woo_payload(price_step=100)),
+    ]))
+
+    (status, _), writes, _ = steps[2]
+    assert status == 200
+    # Товар не изменился, поэтому не сохраняется, но вариации сверены и цены возвращены
+    assert writes == {f"POST {FakeWooServer.PREFIX}/products/{{product_id}}/variations/batch": 1}
+    assert prices(server) == expected_prices(100)
+
+
+def test_unchanged_prices_send_no_writes():
+    steps, _ = asyncio.run(sync_sequence([
+        ("full", woo_payload()),
+        ("prices", woo_payload()),
+    ]))
+
+    result, writes, _ = steps[1]
+    assert result == (200, {"id": steps[0][0][1]["id"], "message": "Цены не изменились"})
+    assert writes == {}
@@ -0,0 +1,61 @@
+"""
+Число записей в WooCommerce при выгрузке одного товара (заглушка `FakeWooServer`).
+"""
+import asyncio
+
+from tests.support.factories import woo_payload
+from tests.support.fake_servers import FakeWooServer, woo_client_session
+
+PRODUCT = "/wp-json/wc/v3/products"
+
+
+async def upload_twice(first, second) -> tuple[dict, dict, FakeWooServer]:
+    """
+    Выгружает `first`, затем `second`; возвращает счётчики записей по каждой выгрузке.
+    """
+    async with woo_client_session() as (server, client):
+        await client.warm_reference_cache()
+        counts = []
+        for base, variations in (first, second):
+            server.requests.clear()
+            status, _ = await client.create_or_update_variable_product_with_variations(base, variations)
+            assert status in (200, 201)
+            counts.append(server.product_writes())
+    return counts[0], counts[1], server
+
+
+def test_create_then_update_uses_minimum_saves():
+    created, updated, server = asyncio.run(upload_twice(woo_payload(), woo_payload(price_step=200)))
+
+    # Новый товар: POST товара, один batch вариаций, финальный PUT
+    assert created == {f"POST {PRODUCT}": 1,
+                       f"POST {PRODUCT}/{{product_id}}/variations/batch": 1,
+                       f"PUT {PRODUCT}/{{product_id}}": 1}
+    # Изменились только цены: один batch вариаций, товар не сохраняется
+    assert updated == {f"POST {PRODUCT}/{{product_id}}/variations/batch": 1}
+    [variations] = server.variations.values()
+    assert len(variations) == 12
+
+
+def test_changed_product_fields_use_one_save():
+    base, variations = woo_payload()
+    _, updated, server = asyncio.run(upload_twice((base, variations),
+                                                  ({**base, "name": "Новое название"}, variations)))
+
+    # Вариации не изменились: только PUT товара
+    assert updated == {f"PUT {PRODUCT}/{{product_id}}": 1}
+    [product] = server.products.values()
+    assert product["name"] == "Новое название"
+
+
+def test_unchanged_product_is_not_written():
+    _, updated, _ = asyncio.run(upload_twice(woo_payload(), woo_payload()))
+
+    assert updated == {}
+
+
+def test_variations_batch_is_chunked_by_batch_limit():
+    created, _, _ = asyncio.run(upload_twice(woo_payload(sizes=130), woo_payload(sizes=130)))
+
+    assert created[f"POST {PRODUCT}/{{product_id}}/variations/batch"] == 2
+    assert created[f"PUT {PRODUCT}/{{product_id}}"] == 1
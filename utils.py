@@ -1,9 +1,8 @@
-import asyncio
+import hashlib
+import json
 import re
 from urllib.parse import urlparse
 
-from loguru import logger
-
 
 def extract_slug(url: str) -> str:
     """
@@ -19,25 +18,12 @@ def extract_slug(url: str) -> str:
     return ""
 
 
-async def retry_async(
-        func,
-        *args,
-        retries: int = 3,
-        delay: float = 1.0,
-        allowed_exceptions: tuple = (Exception,),
-        **kwargs
-):
-    attempt = 0
-    while attempt < retries:
-        try:
-            return await func(*args, **kwargs)
-        except allowed_exceptions as e:
-            attempt += 1
-            logger.warning(f"[retry_async] Ошибка при вызове {func.__name__}: {e}. Попытка {attempt}/{retries}")
-            if attempt >= retries:
-                logger.error(f"[retry_async] Все {retries} попытки исчерпаны.")
-                raise e
-            await asyncio.sleep(delay)
+def content_hash(*objects) -> str:
+    """
+    Стабильный хэш содержимого JSON-совместимых объектов (не зависит от порядка ключей).
+    """
+    raw = json.dumps(objects, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
 
 
 def is_url(string):